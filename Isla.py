@@ -5,7 +5,23 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
 import json
+import os
 import time
+import uuid
+
+import analytics_export
+import audit_log
+import auth
+import currency
+import ledger
+import equity_screening
+import i18n
+import learning
+import partnership
+import projection
+import review_queue
+from bulk_import import import_statement
+from compliance import screen_description
 
 # Configure the page
 st.set_page_config(
@@ -62,52 +78,219 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize session state for user data
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = {
-        'name': 'Ahmed Hassan',
-        'savings': 150000,
-        'investments': 75000,
-        'zakat_paid': 3750,
-        'compliance_score': 92,
-        'last_login': datetime.now().strftime("%Y-%m-%d")
-    }
+def render_fan_chart(result, title):
+    fan = currency.convert_frame(result['fan'], result['fan'].columns, display_currency)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=fan.index, y=fan['p95'], mode='lines', line=dict(width=0), showlegend=False))
+    fig.add_trace(go.Scatter(x=fan.index, y=fan['p5'], mode='lines', line=dict(width=0), fill='tonexty',
+                             fillcolor='rgba(37, 99, 235, 0.15)', name='5th-95th percentile'))
+    fig.add_trace(go.Scatter(x=fan.index, y=fan['p75'], mode='lines', line=dict(width=0), showlegend=False))
+    fig.add_trace(go.Scatter(x=fan.index, y=fan['p25'], mode='lines', line=dict(width=0), fill='tonexty',
+                             fillcolor='rgba(37, 99, 235, 0.35)', name='25th-75th percentile'))
+    fig.add_trace(go.Scatter(x=fan.index, y=fan['p50'], mode='lines', name='Median', line=dict(color='#059669')))
+    fig.update_layout(title=title, xaxis_title="Month", yaxis_title=f"Value ({display_currency})", height=350)
+    st.plotly_chart(fig, use_container_width=True)
 
-if 'transactions' not in st.session_state:
-    st.session_state.transactions = [
-        {'date': '2023-10-01', 'type': 'Murabaha', 'amount': 50000, 'status': 'Completed'},
-        {'date': '2023-10-05', 'type': 'Ijara', 'amount': 25000, 'status': 'Pending'},
-        {'date': '2023-10-10', 'type': 'Musharakah', 'amount': 100000, 'status': 'Completed'},
-    ]
+# Language selection comes first so every label below can be translated
+language = st.sidebar.selectbox("Language", list(i18n.LANGUAGES), format_func=i18n.LANGUAGES.get)
+_ = i18n.translator(language)
 
-if 'investments' not in st.session_state:
-    st.session_state.investments = [
-        {'name': 'Sukuk Al-Ijarah', 'amount': 30000, 'return': 8.5, 'maturity': '2024-06-15'},
-        {'name': 'Halal Equity Fund', 'amount': 25000, 'return': 12.2, 'maturity': '2025-01-20'},
-        {'name': 'Islamic Real Estate Fund', 'amount': 20000, 'return': 7.8, 'maturity': '2024-09-30'},
-    ]
+if i18n.direction(language) == "rtl":
+    st.markdown("""
+    <style>
+        .main .block-container, section[data-testid="stSidebar"] {
+            direction: rtl;
+            text-align: right;
+        }
+    </style>
+    """, unsafe_allow_html=True)
 
 # App Header
 st.markdown('<h1 class="main-header">🌙 Baraka FinTech</h1>', unsafe_allow_html=True)
-st.markdown('<h3 style="text-align: center; color: #4B5563;">Islamic Banking Compliance & Empowerment Platform</h3>', unsafe_allow_html=True)
+st.markdown(f'<h3 style="text-align: center; color: #4B5563;">{_("Islamic Banking Compliance & Empowerment Platform")}</h3>', unsafe_allow_html=True)
+
+# Sign-in: verified token claims are cached in-process, so reruns never touch the database
+claims = None
+if 'auth_token' in st.session_state:
+    try:
+        claims = auth.verify_token(st.session_state.auth_token)
+    except auth.AuthError:
+        del st.session_state.auth_token
+
+if claims is None:
+    conn = ledger.connect()
+    try:
+        tenants = dict(auth.list_tenants(conn))
+        login_tab, register_tab = st.tabs(["Sign In", "Create Account"])
+        
+        with login_tab:
+            with st.form("login"):
+                tenant_id = st.selectbox("Bank", list(tenants), format_func=tenants.get)
+                username = st.text_input("Username")
+                password = st.text_input("Password", type="password")
+                if st.form_submit_button("Sign In"):
+                    try:
+                        st.session_state.auth_token = auth.login(conn, tenant_id, username, password)
+                    except auth.AuthError as e:
+                        st.error(str(e))
+                    else:
+                        st.rerun()
+        
+        with register_tab:
+            with st.form("register"):
+                tenant_id = st.selectbox("Bank", list(tenants), format_func=tenants.get, key="register_bank")
+                display_name = st.text_input("Full Name")
+                username = st.text_input("Username", key="register_username")
+                password = st.text_input("Password", type="password", key="register_password")
+                if st.form_submit_button("Create Account"):
+                    try:
+                        auth.create_user(conn, tenant_id, username, password, display_name or username)
+                        st.session_state.auth_token = auth.login(conn, tenant_id, username, password)
+                    except auth.AuthError as e:
+                        st.error(str(e))
+                    else:
+                        st.rerun()
+    finally:
+        conn.close()
+    st.stop()
+
+# Sample investment opportunities
+INVESTMENT_OPPORTUNITIES = [
+    {
+        "name": "Sukuk Al-Ijarah - Government",
+        "type": "Sukuk",
+        "return": 8.5,
+        "risk": "Low",
+        "min_investment": 50000,
+        "duration": "3 years",
+        "description": "Government infrastructure project financing through Ijarah structure"
+    },
+    {
+        "name": "Halal Equity Fund",
+        "type": "Equity",
+        "return": 12.2,
+        "risk": "Medium",
+        "min_investment": 10000,
+        "duration": "5 years",
+        "description": "Diversified portfolio of Sharia-compliant stocks"
+    },
+    {
+        "name": "Islamic Real Estate Fund",
+        "type": "Real Estate",
+        "return": 7.8,
+        "risk": "Medium",
+        "min_investment": 50000,
+        "duration": "7 years",
+        "description": "Income-generating commercial real estate properties"
+    },
+    {
+        "name": "Green Energy Sukuk",
+        "type": "Sukuk",
+        "return": 9.2,
+        "risk": "Medium",
+        "min_investment": 25000,
+        "duration": "5 years",
+        "description": "Financing for renewable energy projects"
+    }
+]
+
+# Holdings that earlier versions recorded for first-time users; maturities are fixed dates
+OPENING_PORTFOLIO = [
+    {'name': 'Sukuk Al-Ijarah', 'amount': 30000, 'return': 8.5, 'maturity': '2024-06-15'},
+    {'name': 'Halal Equity Fund', 'amount': 25000, 'return': 12.2, 'maturity': '2025-01-20'},
+    {'name': 'Islamic Real Estate Fund', 'amount': 20000, 'return': 7.8, 'maturity': '2024-09-30'},
+]
+
+
+def portfolio_from_holdings(holdings):
+    """Rebuild the session's investment list from the audit log's holdings."""
+    opening = {item['name']: item for item in OPENING_PORTFOLIO}
+    offered = {opportunity['name']: opportunity for opportunity in INVESTMENT_OPPORTUNITIES}
+    opening_total = sum(item['amount'] for item in OPENING_PORTFOLIO)
+    portfolio = []
+    for holding in holdings:
+        if holding['name'] == "Opening portfolio":
+            # Logs from before opening holdings were recorded one by one
+            portfolio.extend(dict(item, amount=holding['amount'] * item['amount'] / opening_total) for item in OPENING_PORTFOLIO)
+        elif holding['name'] in opening:
+            portfolio.append(dict(opening[holding['name']], amount=holding['amount']))
+        elif holding['name'] in offered:
+            opportunity = offered[holding['name']]
+            maturity = datetime.fromtimestamp(holding['last_invested']) + timedelta(days=round(projection.duration_months(opportunity['duration']) * 30.44))
+            portfolio.append({'name': holding['name'], 'amount': holding['amount'], 'return': opportunity['return'],
+                              'maturity': maturity.strftime("%Y-%m-%d")})
+        else:
+            asset_class = projection.asset_class_for(holding['name'])
+            portfolio.append({'name': holding['name'], 'amount': holding['amount'],
+                              'return': projection.ASSET_CLASS_ASSUMPTIONS[asset_class]['return'], 'maturity': ''})
+    return portfolio
+
+
+audit = audit_log.get_log()
+
+# Initialize session state for the signed-in user, resetting it when the user changes
+new_user = st.session_state.get('user_data', {}).get('user_id') != claims['sub']
+
+if new_user:
+    # Balances are rebuilt from the audit log, which only holds money that actually moved;
+    # first-time users start at zero
+    account = audit.user_state(claims['sub'])
+    
+    st.session_state.user_data = {
+        'user_id': claims['sub'],
+        'tenant_id': claims['tenant'],
+        'bank': claims['tenant_name'],
+        'name': claims['name'],
+        'savings': account['savings'],
+        'investments': account['investments'],
+        'zakat_paid': account['zakat_paid'],
+        'compliance_score': 92,
+        'last_login': datetime.now().strftime("%Y-%m-%d")
+    }
+    st.session_state.pop('calculated_zakat', None)
+    st.session_state.pop('generated_contract', None)
+    st.session_state.pop('learning_progress', None)
+
+if new_user or 'investments' not in st.session_state:
+    st.session_state.investments = portfolio_from_holdings(audit.user_holdings(claims['sub']))
 
 # Sidebar for navigation
 st.sidebar.image("https://cdn-icons-png.flaticon.com/512/2103/2103633.png", width=100)
-st.sidebar.title("Navigation")
+st.sidebar.title(_("Navigation"))
+modules = ["Dashboard", "AI Sharia Compliance", "Smart Contracts", "Halal Investments", "Zakat Management", "Education & Advisory"]
+if claims['role'] in review_queue.REVIEWER_ROLES:
+    modules.append("Sharia Board")
 app_module = st.sidebar.selectbox(
-    "Select Module",
-    ["Dashboard", "AI Sharia Compliance", "Smart Contracts", "Halal Investments", "Zakat Management", "Education & Advisory"]
+    _("Select Module"),
+    modules,
+    format_func=_
 )
 
+display_currency = st.sidebar.selectbox("Display Currency", currency.currencies(),
+                                        index=currency.currencies().index(currency.BASE_CURRENCY))
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### User Profile")
 st.sidebar.write(f"**Name:** {st.session_state.user_data['name']}")
+st.sidebar.write(f"**Bank:** {st.session_state.user_data['bank']}")
 st.sidebar.write(f"**Compliance Score:** {st.session_state.user_data['compliance_score']}%")
 st.sidebar.progress(st.session_state.user_data['compliance_score'] / 100)
+if claims['role'] == 'admin' and st.sidebar.button("Export Analytics"):
+    conn = ledger.connect()
+    try:
+        export_stats = analytics_export.export(conn, audit, [st.session_state.user_data['tenant_id']])
+    finally:
+        conn.close()
+    exported = sum(export_stats['rows'].values())
+    st.sidebar.success(f"Exported {exported:,} new rows to {export_stats['files']:,} files")
+if st.sidebar.button("Sign Out"):
+    auth.revoke_cached(st.session_state.auth_token)
+    del st.session_state.auth_token
+    st.rerun()
 
 # Dashboard Module
 if app_module == "Dashboard":
-    st.markdown('<h2 class="sub-header">📊 Dashboard Overview</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">📊 {_("Dashboard Overview")}</h2>', unsafe_allow_html=True)
     
     # Key Metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -115,7 +298,7 @@ if app_module == "Dashboard":
     with col1:
         st.markdown(f"""
         <div class="metric-card">
-            <h3>KES {st.session_state.user_data['savings']:,}</h3>
+            <h3>{currency.format_amount(st.session_state.user_data['savings'], display_currency)}</h3>
             <p>Total Savings</p>
         </div>
         """, unsafe_allow_html=True)
@@ -123,7 +306,7 @@ if app_module == "Dashboard":
     with col2:
         st.markdown(f"""
         <div class="metric-card">
-            <h3>KES {st.session_state.user_data['investments']:,}</h3>
+            <h3>{currency.format_amount(st.session_state.user_data['investments'], display_currency)}</h3>
             <p>Halal Investments</p>
         </div>
         """, unsafe_allow_html=True)
@@ -131,7 +314,7 @@ if app_module == "Dashboard":
     with col3:
         st.markdown(f"""
         <div class="metric-card">
-            <h3>KES {st.session_state.user_data['zakat_paid']:,}</h3>
+            <h3>{currency.format_amount(st.session_state.user_data['zakat_paid'], display_currency)}</h3>
             <p>Zakat Paid (YTD)</p>
         </div>
         """, unsafe_allow_html=True)
@@ -173,12 +356,25 @@ if app_module == "Dashboard":
     with col2:
         st.markdown("#### Recent Transactions")
         
-        transactions_df = pd.DataFrame(st.session_state.transactions)
+        conn = ledger.connect()
+        try:
+            transactions_df = pd.DataFrame(ledger.recent_transactions(
+                conn, st.session_state.user_data['tenant_id'], st.session_state.user_data['user_id'], limit=10))
+        finally:
+            conn.close()
         if not transactions_df.empty:
-            st.dataframe(transactions_df, use_container_width=True)
+            st.dataframe(currency.convert_frame(transactions_df, ['amount'], display_currency), use_container_width=True)
         else:
             st.info("No recent transactions")
         
+        st.markdown("#### Audit Trail")
+        
+        audit_events = pd.DataFrame(audit.user_events(st.session_state.user_data['user_id'], limit=10))
+        if not audit_events.empty:
+            st.dataframe(currency.convert_frame(audit_events, ['amount'], display_currency), use_container_width=True)
+        else:
+            st.info("No recorded activity")
+        
         st.markdown("#### Quick Actions")
         col1, col2, col3 = st.columns(3)
         
@@ -199,7 +395,7 @@ if app_module == "Dashboard":
 
 # AI Sharia Compliance Engine Module
 elif app_module == "AI Sharia Compliance":
-    st.markdown('<h2 class="sub-header">🧠 AI Sharia Compliance Engine</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">🧠 {_("AI Sharia Compliance Engine")}</h2>', unsafe_allow_html=True)
     
     st.markdown("""
     <div class="module-card">
@@ -210,7 +406,7 @@ elif app_module == "AI Sharia Compliance":
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("Transaction Analysis")
+        st.subheader(_("Transaction Analysis"))
         
         transaction_text = st.text_area(
             "Enter transaction details to analyze:",
@@ -221,11 +417,11 @@ elif app_module == "AI Sharia Compliance":
             with st.spinner("Analyzing for Sharia compliance..."):
                 time.sleep(2)
                 
-                # Mock analysis results
+                screening = screen_description(transaction_text)
                 st.markdown("### Analysis Results")
                 
                 # Check for interest (riba)
-                if "interest" in transaction_text.lower():
+                if screening['riba']:
                     st.markdown("""
                     <div class="warning-box">
                         <h4>🚨 Potential Riba (Interest) Detected</h4>
@@ -242,7 +438,7 @@ elif app_module == "AI Sharia Compliance":
                     """, unsafe_allow_html=True)
                 
                 # Check for excessive uncertainty (gharar)
-                if "uncertain" in transaction_text.lower() or "speculative" in transaction_text.lower():
+                if screening['gharar']:
                     st.markdown("""
                     <div class="warning-box">
                         <h4>⚠️ Potential Gharar (Uncertainty) Detected</h4>
@@ -252,8 +448,7 @@ elif app_module == "AI Sharia Compliance":
                     """, unsafe_allow_html=True)
                 
                 # Check for prohibited sectors
-                prohibited_sectors = ["alcohol", "gambling", "pork", "casino", "tobacco"]
-                detected_sectors = [sector for sector in prohibited_sectors if sector in transaction_text.lower()]
+                detected_sectors = screening['sectors']
                 
                 if detected_sectors:
                     st.markdown(f"""
@@ -263,9 +458,38 @@ elif app_module == "AI Sharia Compliance":
                         <p><strong>Recommendation:</strong> Consider alternative Sharia-compliant investment opportunities.</p>
                     </div>
                     """, unsafe_allow_html=True)
+        
+        st.subheader(_("Bulk Statement Import"))
+        
+        statement_file = st.file_uploader(
+            "Upload bank statement (CSV, JSON lines or OFX)",
+            type=["csv", "jsonl", "ndjson", "ofx", "qfx"]
+        )
+        
+        if statement_file is not None and st.button("Import & Screen"):
+            with st.spinner("Importing and screening transactions..."):
+                try:
+                    stats = import_statement(statement_file.name, statement_file.getvalue(),
+                                             tenant_id=st.session_state.user_data['tenant_id'],
+                                             user_id=st.session_state.user_data['user_id'])
+                except ValueError as e:
+                    st.error(f"Could not import statement: {e}")
+                else:
+                    st.success(f"Imported {stats['rows']:,} transactions in {stats['seconds']:.2f}s "
+                               f"({stats['rows_per_sec']:,.0f} rows/sec)")
+                    if stats['flagged']:
+                        st.warning(f"{stats['flagged']:,} transactions flagged for riba, gharar or prohibited sectors")
+                    
+                    conn = ledger.connect()
+                    try:
+                        recent = ledger.recent_transactions(conn, st.session_state.user_data['tenant_id'],
+                                                            st.session_state.user_data['user_id'], limit=20)
+                        st.dataframe(pd.DataFrame(recent), use_container_width=True)
+                    finally:
+                        conn.close()
     
     with col2:
-        st.subheader("Compliance Dashboard")
+        st.subheader(_("Compliance Dashboard"))
         
         # Compliance metrics
         st.metric("Overall Compliance Score", f"{st.session_state.user_data['compliance_score']}%")
@@ -283,7 +507,7 @@ elif app_module == "AI Sharia Compliance":
         st.plotly_chart(fig, use_container_width=True)
         
         # Recent compliance checks
-        st.subheader("Recent Compliance Checks")
+        st.subheader(_("Recent Compliance Checks"))
         
         compliance_checks = [
             {'Date': '2023-10-15', 'Transaction': 'Murabaha Financing', 'Status': 'Compliant', 'Details': 'No issues found'},
@@ -295,7 +519,7 @@ elif app_module == "AI Sharia Compliance":
 
 # Smart Contract Automation Module
 elif app_module == "Smart Contracts":
-    st.markdown('<h2 class="sub-header">📜 Smart Contract Automation</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">📜 {_("Smart Contract Automation")}</h2>', unsafe_allow_html=True)
     
     st.markdown("""
     <div class="module-card">
@@ -306,14 +530,15 @@ elif app_module == "Smart Contracts":
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        st.subheader("Create New Contract")
+        st.subheader(_("Create New Contract"))
         
         contract_type = st.selectbox(
             "Select Contract Type",
-            ["Murabaha (Cost-Plus Financing)", "Musharakah (Partnership)", "Ijara (Leasing)", "Salam (Advance Payment)", "Istisna (Manufacturing Contract)"]
+            ["Murabaha (Cost-Plus Financing)", "Musharakah (Partnership)", "Mudarabah (Profit Sharing)", "Ijara (Leasing)", "Salam (Advance Payment)", "Istisna (Manufacturing Contract)"]
         )
+        is_partnership = contract_type.startswith(("Musharakah", "Mudarabah"))
         
-        st.subheader("Contract Details")
+        st.subheader(_("Contract Details"))
         
         col1a, col2a = st.columns(2)
         
@@ -324,72 +549,168 @@ elif app_module == "Smart Contracts":
         
         with col2a:
             contract_value = st.number_input("Contract Value (KES)", min_value=1000, value=500000, step=1000)
-            profit_margin = st.number_input("Profit Margin (%)", min_value=0.0, value=8.5, step=0.1)
+            if is_partnership:
+                if contract_type.startswith("Mudarabah"):
+                    # The financier provides all capital; the customer contributes effort
+                    bank_capital_pct = 100
+                    st.write("**Capital:** 100% provided by the Financier")
+                else:
+                    bank_capital_pct = st.slider("Financier Capital Share (%)", min_value=1, max_value=99, value=70)
+                bank_profit_ratio = st.slider("Financier Profit Ratio (%)", min_value=1, max_value=99, value=60)
+            else:
+                profit_margin = st.number_input("Profit Margin (%)", min_value=0.0, value=8.5, step=0.1)
             duration = st.selectbox("Contract Duration", ["3 months", "6 months", "1 year", "2 years", "3 years", "5 years"])
         
         payment_terms = st.selectbox("Payment Terms", ["Lump sum at maturity", "Monthly installments", "Quarterly installments"])
         
+        diminishing = False
+        if contract_type.startswith("Musharakah"):
+            diminishing = st.checkbox("Diminishing Musharakah (customer buys out the Financier's share)")
+            if diminishing:
+                rent_rate = st.number_input("Rent on Financier's Share (% per period)", min_value=0.0, value=0.8, step=0.1)
+        
+        if is_partnership:
+            terms_line = (f"**{_('Capital Contribution')}:** {_('Financier')} {bank_capital_pct}% / {_('Customer')} {100 - bank_capital_pct}%\n\n"
+                          f"**{_('Profit Sharing')}:** {_('Financier')} {bank_profit_ratio}% / {_('Customer')} {100 - bank_profit_ratio}% "
+                          f"({_('losses borne in proportion to capital')})")
+        else:
+            terms_line = f"**{_('Profit Margin')}:** {profit_margin}%"
+        
+        # The contract stays denominated in KES; other display currencies are shown alongside
+        value_line = currency.format_amount(contract_value)
+        if display_currency != currency.BASE_CURRENCY:
+            value_line += f" (≈ {currency.format_amount(contract_value, display_currency, 2)})"
+        
         if st.button("Generate Contract"):
             with st.spinner("Generating smart contract..."):
                 time.sleep(3)
                 
-                st.success("✅ Smart contract generated successfully!")
-                
-                # Display contract preview
-                st.subheader("Contract Preview")
-                
-                st.markdown(f"""
-                ### {contract_type} Agreement
-                
-                **Between:** {party_a} (Hereinafter referred to as the "Financier")
-                
-                **And:** {party_b} (Hereinafter referred to as the "Customer")
-                
-                **Asset:** {asset_description}
-                
-                **Contract Value:** KES {contract_value:,}
-                
-                **Profit Margin:** {profit_margin}%
-                
-                **Duration:** {duration}
-                
-                **Payment Terms:** {payment_terms}
-                
-                **Terms and Conditions:**
-                
-                1. This contract is governed by Sharia principles and complies with AAOIFI standards.
-                2. All transactions under this contract are free from Riba (interest).
-                3. The asset remains in the ownership of the Financier until full payment is received.
-                4. The Customer bears all maintenance costs during the contract period.
-                5. Any dispute shall be resolved through Sharia-compliant arbitration.
-                
-                **Digital Signature:** 
-                - Financier: ____________________ (To be signed digitally)
-                - Customer: ____________________ (To be signed digitally)
-                
-                **Blockchain Hash:** `0x1a2b3c4d5e6f7890abcdef1234567890`
-                """)
+                contract_text = f"""### {contract_type} {_('Agreement')}
+
+**{_('Between')}:** {party_a} ({_('Hereinafter referred to as the "Financier"')})
+
+**{_('And')}:** {party_b} ({_('Hereinafter referred to as the "Customer"')})
+
+**{_('Asset')}:** {asset_description}
+
+**{_('Contract Value')}:** {value_line}
+
+{terms_line}
+
+**{_('Duration')}:** {duration}
+
+**{_('Payment Terms')}:** {payment_terms}
+
+**{_('Terms and Conditions')}:**
+
+1. {_('This contract is governed by Sharia principles and complies with AAOIFI standards.')}
+2. {_('All transactions under this contract are free from Riba (interest).')}
+3. {_('The asset remains in the ownership of the Financier until full payment is received.')}
+4. {_('The Customer bears all maintenance costs during the contract period.')}
+5. {_('Any dispute shall be resolved through Sharia-compliant arbitration.')}
+
+**{_('Digital Signature')}:**
+- {_('Financier')}: ____________________ ({_('To be signed digitally')})
+- {_('Customer')}: ____________________ ({_('To be signed digitally')})
+
+**{_('Blockchain Hash')}:** `0x1a2b3c4d5e6f7890abcdef1234567890`
+"""
                 
-                col1b, col2b, col3b = st.columns(3)
+                schedule = None
+                if diminishing:
+                    months = projection.duration_months(duration)
+                    periods = {"Monthly installments": months, "Quarterly installments": months // 3}.get(payment_terms, 1)
+                    schedule = partnership.diminishing_schedule(contract_value, bank_capital_pct / 100, max(periods, 1), rent_rate / 100)
                 
-                with col1b:
-                    st.download_button(
-                        "Download Contract PDF",
-                        data="Mock contract content",
-                        file_name=f"{contract_type.replace(' ', '_')}_Contract.pdf",
-                        mime="application/pdf"
-                    )
+                # Keep the contract across reruns so its action buttons still see it
+                st.session_state.generated_contract = {
+                    'id': uuid.uuid4().hex[:12],
+                    'type': contract_type,
+                    'value': contract_value,
+                    'text': contract_text,
+                    'schedule': schedule,
+                }
                 
-                with col2b:
-                    if st.button("Send for Sharia Board Review"):
+                st.success("✅ Smart contract generated successfully!")
+        
+        if 'generated_contract' in st.session_state:
+            contract = st.session_state.generated_contract
+            
+            # Display contract preview
+            st.subheader(_("Contract Preview"))
+            st.markdown(contract['text'])
+            
+            if contract['schedule'] is not None:
+                st.subheader(_("Buyout Schedule"))
+                st.dataframe(contract['schedule'], use_container_width=True)
+            
+            col1b, col2b, col3b = st.columns(3)
+            
+            with col1b:
+                st.download_button(
+                    _("Download Contract"),
+                    data=i18n.export_text(contract['text'], language),
+                    file_name=f"{contract['type'].replace(' ', '_')}_Contract.txt",
+                    mime="text/plain; charset=utf-8"
+                )
+            
+            with col2b:
+                if st.button("Send for Sharia Board Review"):
+                    conn = ledger.connect()
+                    try:
+                        queued = review_queue.submit(conn, st.session_state.user_data['tenant_id'], contract['id'],
+                                                     contract['type'], contract['value'], st.session_state.user_data['user_id'])
+                    finally:
+                        conn.close()
+                    if queued:
+                        audit.append(audit_log.SHARIA_REVIEW, st.session_state.user_data['tenant_id'],
+                                     st.session_state.user_data['user_id'], contract['value'], contract['id'])
                         st.info("Contract sent to Sharia Board for approval")
-                
-                with col3b:
-                    if st.button("Sign Digitally"):
-                        st.success("Contract signed successfully! Hash recorded on blockchain.")
+                    else:
+                        st.info("Contract is already with the Sharia Board")
+            
+            with col3b:
+                if st.button("Sign Digitally"):
+                    audit.append(audit_log.SIGN_CONTRACT, st.session_state.user_data['tenant_id'],
+                                 st.session_state.user_data['user_id'], contract['value'], contract['id'])
+                    st.success("Contract signed successfully! Hash recorded on blockchain.")
+        
+        # Distributions book the bank's figures, so only bank staff may run them
+        if claims['role'] in review_queue.REVIEWER_ROLES:
+            st.subheader(_("Period-End Partnership Distributions"))
+        
+            partnerships_file = st.file_uploader(
+                "Upload partnerships with period profit (CSV, bank_profit_ratio in percent)",
+                type=["csv"],
+                key="partnerships_upload"
+            )
+        
+            distribution_period = st.text_input("Distribution Period", value=datetime.now().strftime("%Y-%m"))
+        
+            if partnerships_file is not None and st.button("Run Distribution"):
+                with st.spinner("Distributing profit and loss..."):
+                    try:
+                        partnerships = partnership.load_partnerships(partnerships_file)
+                    except ValueError as e:
+                        st.error(f"Could not load partnerships: {e}")
+                    else:
+                        distributions = partnership.distribute(partnerships)
+                        conn = ledger.connect()
+                        try:
+                            written = partnership.record_distributions(conn, distributions, period=distribution_period,
+                                                                       tenant_id=st.session_state.user_data['tenant_id'])
+                        finally:
+                            conn.close()
+                    
+                        st.success(f"Recorded {written:,} distributions for {distribution_period} to the ledger")
+                        col1c, col2c, col3c = st.columns(3)
+                        col1c.metric("Financier Share", currency.format_amount(distributions['bank_amount'].sum(), display_currency, 2))
+                        col2c.metric("Customer Share", currency.format_amount(distributions['customer_amount'].sum(), display_currency, 2))
+                        col3c.metric("Capital Bought Out", currency.format_amount(distributions['buyout'].sum(), display_currency, 2))
+                        st.dataframe(distributions.head(500), use_container_width=True)
     
     with col2:
-        st.subheader("Contract Templates")
+        st.subheader(_("Contract Templates"))
         
         templates = [
             {"name": "Murabaha", "usage": "Asset Financing", "complexity": "Medium"},
@@ -405,23 +726,23 @@ elif app_module == "Smart Contracts":
                 if st.button(f"Use Template", key=template['name']):
                     st.info(f"{template['name']} template selected")
         
-        st.subheader("Contract History")
+        st.subheader(_("Contract History"))
         
         contract_history = [
-            {"Date": "2023-09-15", "Type": "Murabaha", "Value": "KES 750,000", "Status": "Active"},
-            {"Date": "2023-08-22", "Type": "Ijara", "Value": "KES 1,200,000", "Status": "Completed"},
-            {"Date": "2023-07-10", "Type": "Musharakah", "Value": "KES 2,500,000", "Status": "Active"},
+            {"Date": "2023-09-15", "Type": "Murabaha", "Value": 750000, "Status": "Active"},
+            {"Date": "2023-08-22", "Type": "Ijara", "Value": 1200000, "Status": "Completed"},
+            {"Date": "2023-07-10", "Type": "Musharakah", "Value": 2500000, "Status": "Active"},
         ]
         
         for contract in contract_history:
             st.write(f"**{contract['Date']}** - {contract['Type']}")
-            st.write(f"Value: {contract['Value']} | Status: {contract['Status']}")
+            st.write(f"Value: {currency.format_amount(contract['Value'], display_currency)} | Status: {contract['Status']}")
             st.progress(80 if contract['Status'] == 'Active' else 100)
             st.write("---")
 
 # Halal Investments Module
 elif app_module == "Halal Investments":
-    st.markdown('<h2 class="sub-header">💹 Sukuk & Halal Investment Marketplace</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">💹 {_("Sukuk & Halal Investment Marketplace")}</h2>', unsafe_allow_html=True)
     
     st.markdown("""
     <div class="module-card">
@@ -429,59 +750,19 @@ elif app_module == "Halal Investments":
     </div>
     """, unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["Investment Opportunities", "My Portfolio", "Sukuk Marketplace"])
+    tab1, tab2, tab3, tab4 = st.tabs([_("Investment Opportunities"), _("My Portfolio"), _("Sukuk Marketplace"), _("Equity Screening")])
     
     with tab1:
-        st.subheader("Available Investment Opportunities")
+        st.subheader(_("Available Investment Opportunities"))
         
-        # Sample investment opportunities
-        opportunities = [
-            {
-                "name": "Sukuk Al-Ijarah - Government",
-                "type": "Sukuk",
-                "return": 8.5,
-                "risk": "Low",
-                "min_investment": 50000,
-                "duration": "3 years",
-                "description": "Government infrastructure project financing through Ijarah structure"
-            },
-            {
-                "name": "Halal Equity Fund",
-                "type": "Equity",
-                "return": 12.2,
-                "risk": "Medium",
-                "min_investment": 10000,
-                "duration": "5 years",
-                "description": "Diversified portfolio of Sharia-compliant stocks"
-            },
-            {
-                "name": "Islamic Real Estate Fund",
-                "type": "Real Estate",
-                "return": 7.8,
-                "risk": "Medium",
-                "min_investment": 50000,
-                "duration": "7 years",
-                "description": "Income-generating commercial real estate properties"
-            },
-            {
-                "name": "Green Energy Sukuk",
-                "type": "Sukuk",
-                "return": 9.2,
-                "risk": "Medium",
-                "min_investment": 25000,
-                "duration": "5 years",
-                "description": "Financing for renewable energy projects"
-            }
-        ]
-        
-        for i, opportunity in enumerate(opportunities):
+        for i, opportunity in enumerate(INVESTMENT_OPPORTUNITIES):
             with st.expander(f"{opportunity['name']} - Expected Return: {opportunity['return']}%", expanded=True if i==0 else False):
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
                     st.write(f"**Type:** {opportunity['type']}")
                     st.write(f"**Risk Level:** {opportunity['risk']}")
-                    st.write(f"**Minimum Investment:** KES {opportunity['min_investment']:,}")
+                    st.write(f"**Minimum Investment:** {currency.format_amount(opportunity['min_investment'], display_currency)}")
                     st.write(f"**Duration:** {opportunity['duration']}")
                     st.write(f"**Description:** {opportunity['description']}")
                 
@@ -507,14 +788,25 @@ elif app_module == "Halal Investments":
                                 'name': opportunity['name'],
                                 'amount': investment_amount,
                                 'return': opportunity['return'],
-                                'maturity': (datetime.now() + timedelta(days=365*3)).strftime("%Y-%m-%d")
+                                'maturity': (datetime.now() + timedelta(days=round(projection.duration_months(opportunity['duration']) * 30.44))).strftime("%Y-%m-%d")
                             }
                             st.session_state.investments.append(new_investment)
+                            audit.append(audit_log.INVEST, st.session_state.user_data['tenant_id'],
+                                         st.session_state.user_data['user_id'], investment_amount, opportunity['name'])
                             
-                            st.success(f"Successfully invested KES {investment_amount:,} in {opportunity['name']}")
+                            st.success(f"Successfully invested {currency.format_amount(investment_amount, display_currency)} in {opportunity['name']}")
+                
+                if st.button("Project Returns", key=f"project_{i}"):
+                    with st.spinner("Simulating outcomes..."):
+                        result = projection.project_opportunity(
+                            opportunity,
+                            investment_amount,
+                            projection.duration_months(opportunity['duration'])
+                        )
+                    render_fan_chart(result, f"Projected value of {currency.format_amount(investment_amount, display_currency)} over {opportunity['duration']}")
     
     with tab2:
-        st.subheader("My Investment Portfolio")
+        st.subheader(_("My Investment Portfolio"))
         
         if not st.session_state.investments:
             st.info("You don't have any investments yet. Explore opportunities in the 'Investment Opportunities' tab.")
@@ -524,12 +816,12 @@ elif app_module == "Halal Investments":
             avg_return = sum(inv['return'] * inv['amount'] for inv in st.session_state.investments) / total_invested
             
             col1, col2, col3 = st.columns(3)
-            col1.metric("Total Invested", f"KES {total_invested:,}")
+            col1.metric("Total Invested", currency.format_amount(total_invested, display_currency))
             col2.metric("Number of Investments", len(st.session_state.investments))
             col3.metric("Average Return", f"{avg_return:.1f}%")
             
             # Investment breakdown
-            st.subheader("Investment Breakdown")
+            st.subheader(_("Investment Breakdown"))
             
             investment_names = [inv['name'] for inv in st.session_state.investments]
             investment_amounts = [inv['amount'] for inv in st.session_state.investments]
@@ -542,12 +834,38 @@ elif app_module == "Halal Investments":
             st.plotly_chart(fig, use_container_width=True)
             
             # Investment details
-            st.subheader("Investment Details")
-            investments_df = pd.DataFrame(st.session_state.investments)
+            st.subheader(_("Investment Details"))
+            investments_df = currency.convert_frame(pd.DataFrame(st.session_state.investments), ['amount'], display_currency)
             st.dataframe(investments_df, use_container_width=True)
+            
+            # Portfolio projection
+            st.subheader(_("Portfolio Projection"))
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                horizon_years = st.slider("Horizon (years)", min_value=1, max_value=30, value=10)
+            with col2:
+                goal_amount = st.number_input("Goal (KES)", min_value=0, value=int(total_invested * 2), step=10000)
+            with col3:
+                n_paths = st.select_slider("Simulated Paths", options=[10000, 50000, 100000, 250000], value=100000)
+            
+            if st.button("Run Projection"):
+                with st.spinner("Running Monte Carlo simulation..."):
+                    result = projection.project_portfolio(
+                        st.session_state.investments,
+                        months=horizon_years * 12,
+                        n_paths=n_paths,
+                        goal=goal_amount,
+                        workers=os.cpu_count() if n_paths > 100000 else 1
+                    )
+                
+                render_fan_chart(result, f"Projected Portfolio Value over {horizon_years} Years")
+                col1, col2 = st.columns(2)
+                col1.metric("Median Final Value", currency.format_amount(result['fan']['p50'].iloc[-1], display_currency, 0))
+                col2.metric("Probability of Meeting Goal", f"{result['goal_probability']:.0%}")
     
     with tab3:
-        st.subheader("Sukuk Marketplace")
+        st.subheader(_("Sukuk Marketplace"))
         
         st.info("""
         Sukuk are Sharia-compliant bonds that represent partial ownership in an asset. 
@@ -592,17 +910,64 @@ elif app_module == "Halal Investments":
                     st.write(f"**Maturity:** {sukuk['maturity']}")
                 
                 with col2:
-                    st.write(f"**Minimum Investment:** KES {sukuk['minimum']:,}")
+                    st.write(f"**Minimum Investment:** {currency.format_amount(sukuk['minimum'], display_currency)}")
                     st.write(f"**Credit Rating:** {sukuk['rating']}")
                 
                 with col3:
                     st.write(f"**Expected Yield:** {sukuk['yield']}%")
                     if st.button("View Details", key=f"sukuk_{sukuk['name']}"):
                         st.info(f"Detailed prospectus for {sukuk['name']} would be displayed here")
+    
+    with tab4:
+        st.subheader(_("Halal Equity Screening"))
+        
+        st.info(f"""
+        Stocks are screened against the prohibited sectors and AAOIFI financial ratios:
+        debt and interest-bearing securities below {equity_screening.MAX_DEBT_RATIO:.0%} of market cap,
+        and impure income below {equity_screening.MAX_IMPURE_INCOME_RATIO:.0%} of revenue.
+        """)
+        
+        fundamentals_file = st.file_uploader("Fundamentals dataset (CSV)", type=["csv"], key="fundamentals_upload")
+        
+        if st.button("Run Quarterly Screen"):
+            with st.spinner("Screening equity universe..."):
+                try:
+                    result = equity_screening.run_quarterly_screen(fundamentals_file)
+                except (FileNotFoundError, ValueError) as e:
+                    st.error(f"Could not screen fundamentals: {e}")
+                else:
+                    st.session_state.equity_screen = result
+        
+        if 'equity_screen' not in st.session_state:
+            cached_screen = equity_screening.load_cached_screen()
+            if cached_screen is not None:
+                st.session_state.equity_screen = cached_screen
+        
+        if 'equity_screen' in st.session_state:
+            result = st.session_state.equity_screen
+            
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Tickers Screened", f"{len(result):,}")
+            col2.metric("Sharia Compliant", f"{int(result['compliant'].sum()):,}")
+            col3.metric("Excluded by Sector", f"{int((~result['sector_ok']).sum()):,}")
+            
+            show_compliant_only = st.checkbox("Show compliant stocks only", value=True)
+            shown = result[result['compliant']] if show_compliant_only else result
+            st.dataframe(shown.head(1000), use_container_width=True)
+            
+            st.subheader(_("Purification Calculator"))
+            ticker = st.text_input("Ticker")
+            shares_held = st.number_input("Shares Held", min_value=0, value=0, step=100)
+            if ticker and shares_held:
+                holding = equity_screening.purification(result, {ticker.strip().upper(): shares_held}).iloc[0]
+                if not holding['found']:
+                    st.warning(f"{holding['ticker']} was not found in the screened universe")
+                else:
+                    st.write(f"**Purification Amount:** {currency.format_amount(holding['purification_amount'], display_currency, 2)}")
 
 # Zakat Management Module
 elif app_module == "Zakat Management":
-    st.markdown('<h2 class="sub-header">💰 Zakat & Sadaqah Management Hub</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">💰 {_("Zakat & Sadaqah Management Hub")}</h2>', unsafe_allow_html=True)
     
     st.markdown("""
     <div class="module-card">
@@ -610,10 +975,10 @@ elif app_module == "Zakat Management":
     </div>
     """, unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["Zakat Calculator", "Zakat Payment", "Sadaqah & Donations"])
+    tab1, tab2, tab3 = st.tabs([_("Zakat Calculator"), _("Zakat Payment"), _("Sadaqah & Donations")])
     
     with tab1:
-        st.subheader("Zakat Calculator")
+        st.subheader(_("Zakat Calculator"))
         
         st.info("""
         Zakat is obligatory for Muslims who meet the Nisab threshold (value of 87.48g of gold or 612.36g of silver).
@@ -623,21 +988,21 @@ elif app_module == "Zakat Management":
         col1, col2 = st.columns(2)
         
         with col1:
-            st.subheader("Your Assets")
-            cash_savings = st.number_input("Cash & Savings (KES)", min_value=0, value=st.session_state.user_data['savings'])
+            st.subheader(_("Your Assets"))
+            cash_savings = st.number_input("Cash & Savings (KES)", min_value=0.0, value=st.session_state.user_data['savings'])
             gold_value = st.number_input("Gold Value (KES)", min_value=0, value=50000)
             silver_value = st.number_input("Silver Value (KES)", min_value=0, value=10000)
-            investments_value = st.number_input("Investments (KES)", min_value=0, value=st.session_state.user_data['investments'])
+            investments_value = st.number_input("Investments (KES)", min_value=0.0, value=st.session_state.user_data['investments'])
             business_assets = st.number_input("Business Assets (KES)", min_value=0, value=0)
             other_assets = st.number_input("Other Assets (KES)", min_value=0, value=0)
         
         with col2:
-            st.subheader("Your Liabilities")
+            st.subheader(_("Your Liabilities"))
             immediate_debts = st.number_input("Immediate Debts (KES)", min_value=0, value=0)
             bills_payable = st.number_input("Bills Payable (KES)", min_value=0, value=0)
             other_liabilities = st.number_input("Other Liabilities (KES)", min_value=0, value=0)
             
-            st.subheader("Zakat Calculation")
+            st.subheader(_("Zakat Calculation"))
             if st.button("Calculate My Zakat"):
                 total_assets = cash_savings + gold_value + silver_value + investments_value + business_assets + other_assets
                 total_liabilities = immediate_debts + bills_payable + other_liabilities
@@ -649,27 +1014,27 @@ elif app_module == "Zakat Management":
                 if net_wealth >= nisab:
                     zakat_payable = net_wealth * 0.025
                     
-                    st.success(f"Your Zakat payable is: KES {zakat_payable:,.2f}")
+                    st.success(f"Your Zakat payable is: {currency.format_amount(zakat_payable, display_currency, 2)}")
                     
                     # Store for potential payment
                     st.session_state.calculated_zakat = zakat_payable
                 else:
-                    st.info(f"Your net wealth (KES {net_wealth:,.2f}) is below the Nisab threshold (KES {nisab:,.2f}). Zakat is not obligatory.")
+                    st.info(f"Your net wealth ({currency.format_amount(net_wealth, display_currency, 2)}) is below the Nisab threshold ({currency.format_amount(nisab, display_currency, 2)}). Zakat is not obligatory.")
     
     with tab2:
-        st.subheader("Zakat Payment")
+        st.subheader(_("Zakat Payment"))
         
         if 'calculated_zakat' in st.session_state:
-            st.metric("Your Calculated Zakat", f"KES {st.session_state.calculated_zakat:,.2f}")
+            st.metric("Your Calculated Zakat", currency.format_amount(st.session_state.calculated_zakat, display_currency, 2))
             
-            st.subheader("Select Recipient")
+            st.subheader(_("Select Recipient"))
             recipient_type = st.selectbox(
                 "Zakat Recipient Category",
                 ["The Poor (Fuqara)", "The Needy (Masakin)", "Zakat Collectors", "Those whose hearts are to be reconciled", 
                  "Those in bondage", "The debt-ridden", "In the cause of Allah", "The wayfarer"]
             )
             
-            st.subheader("Payment Method")
+            st.subheader(_("Payment Method"))
             payment_method = st.radio("Select Payment Method", ["M-Pesa", "Bank Transfer", "Debit Card", "Direct Deduction"])
             
             if st.button("Pay Zakat"):
@@ -679,8 +1044,10 @@ elif app_module == "Zakat Management":
                     # Update user data
                     st.session_state.user_data['zakat_paid'] += st.session_state.calculated_zakat
                     st.session_state.user_data['savings'] -= st.session_state.calculated_zakat
+                    audit.append(audit_log.PAY_ZAKAT, st.session_state.user_data['tenant_id'],
+                                 st.session_state.user_data['user_id'], st.session_state.calculated_zakat, recipient_type)
                     
-                    st.success(f"Zakat payment of KES {st.session_state.calculated_zakat:,.2f} completed successfully!")
+                    st.success(f"Zakat payment of {currency.format_amount(st.session_state.calculated_zakat, display_currency, 2)} completed successfully!")
                     st.balloons()
                     
                     # Reset calculated zakat
@@ -689,7 +1056,7 @@ elif app_module == "Zakat Management":
             st.info("Please calculate your Zakat first using the Zakat Calculator tab.")
     
     with tab3:
-        st.subheader("Sadaqah & Donations")
+        st.subheader(_("Sadaqah & Donations"))
         
         st.info("""
         Sadaqah is voluntary charity that can be given at any time, in any amount, to any worthy cause.
@@ -721,13 +1088,15 @@ elif app_module == "Zakat Management":
             else:
                 # Update user data
                 st.session_state.user_data['savings'] -= donation_amount
+                audit.append(audit_log.DONATE, st.session_state.user_data['tenant_id'],
+                             st.session_state.user_data['user_id'], donation_amount, selected_charity)
                 
-                st.success(f"Thank you for your donation of KES {donation_amount:,} to {selected_charity}!")
+                st.success(f"Thank you for your donation of {currency.format_amount(donation_amount, display_currency)} to {selected_charity}!")
                 st.balloons()
 
 # Education & Advisory Module
 elif app_module == "Education & Advisory":
-    st.markdown('<h2 class="sub-header">📚 Islamic Finance Education & Advisory</h2>', unsafe_allow_html=True)
+    st.markdown(f'<h2 class="sub-header">📚 {_("Islamic Finance Education & Advisory")}</h2>', unsafe_allow_html=True)
     
     st.markdown("""
     <div class="module-card">
@@ -735,10 +1104,10 @@ elif app_module == "Education & Advisory":
     </div>
     """, unsafe_allow_html=True)
     
-    tab1, tab2, tab3 = st.tabs(["Learning Center", "Virtual Advisor", "Certification"])
+    tab1, tab2, tab3 = st.tabs([_("Learning Center"), _("Virtual Advisor"), _("Certification")])
     
     with tab1:
-        st.subheader("Islamic Finance Learning Center")
+        st.subheader(_("Islamic Finance Learning Center"))
         
         topics = [
             {
@@ -773,25 +1142,84 @@ elif app_module == "Education & Advisory":
             }
         ]
         
+        bundle = learning.load_bundle()
+        tenant_id = st.session_state.user_data['tenant_id']
+        user_id = st.session_state.user_data['user_id']
+        
+        # Progress bitsets are read once per user and updated in place after each write
+        if 'learning_progress' not in st.session_state:
+            conn = ledger.connect()
+            try:
+                st.session_state.learning_progress = learning.get_progress(conn, tenant_id, user_id)
+            finally:
+                conn.close()
+        completed, passed = st.session_state.learning_progress
+        
         for topic in topics:
-            with st.expander(f"{topic['title']} ({topic['level']} - {topic['duration']})"):
+            lesson = bundle['by_title'][topic['title']]
+            status = "✅ " if learning.is_set(passed, lesson) else ("📖 " if learning.is_set(completed, lesson) else "")
+            with st.expander(f"{status}{topic['title']} ({topic['level']} - {topic['duration']})"):
                 st.write(topic['description'])
                 
                 col1, col2 = st.columns([3, 1])
                 
                 with col1:
                     if st.button(f"Start Learning", key=f"learn_{topic['title']}"):
-                        st.info(f"Starting lesson: {topic['title']}")
+                        st.session_state.active_lesson = lesson['id']
+                        st.session_state.pop('active_quiz', None)
                 
                 with col2:
                     if st.button("Take Quiz", key=f"quiz_{topic['title']}"):
-                        st.info(f"Quiz for {topic['title']} would open here")
+                        st.session_state.active_quiz = lesson['id']
+                        st.session_state.pop('active_lesson', None)
+        
+        if 'active_lesson' in st.session_state:
+            lesson = bundle['by_id'][st.session_state.active_lesson]
+            st.subheader(lesson['title'])
+            for section in lesson['sections']:
+                st.write(section)
+            
+            if st.button("Mark as Complete"):
+                conn = ledger.connect()
+                try:
+                    learning.mark_completed(conn, tenant_id, user_id, lesson)
+                finally:
+                    conn.close()
+                st.session_state.learning_progress = (completed | 1 << lesson['bit'], passed)
+                st.session_state.active_quiz = lesson['id']
+                del st.session_state.active_lesson
+                st.rerun()
         
-        st.subheader("Video Resources")
+        if 'active_quiz' in st.session_state:
+            lesson = bundle['by_id'][st.session_state.active_quiz]
+            st.subheader(f"Quiz: {lesson['title']}")
+            
+            with st.form(f"quiz_form_{lesson['id']}"):
+                answers = []
+                for i, question in enumerate(lesson['questions']):
+                    choice = st.radio(question['question'], question['options'], index=None, key=f"q_{lesson['id']}_{i}")
+                    answers.append(question['options'].index(choice) if choice is not None else None)
+                submitted = st.form_submit_button("Submit Answers")
+            
+            if submitted:
+                result = learning.grade(bundle, lesson['id'], answers)
+                if result['passed']:
+                    conn = ledger.connect()
+                    try:
+                        learning.mark_passed(conn, tenant_id, user_id, lesson)
+                    finally:
+                        conn.close()
+                    st.session_state.learning_progress = (completed | 1 << lesson['bit'], passed | 1 << lesson['bit'])
+                    st.success(f"Passed! You scored {result['correct']}/{result['total']}.")
+                else:
+                    st.warning(f"You scored {result['correct']}/{result['total']} and need {result['required']} to pass. "
+                               "Review the lesson and try again.")
+        
+        st.subheader(_("Video Resources"))
         st.video("https://www.youtube.com/watch?v=2K7mtA1BBNU")  # Sample Islamic finance video
     
     with tab2:
-        st.subheader("Virtual Sharia Advisor")
+        st.subheader(_("Virtual Sharia Advisor"))
         
         st.info("""
         Our AI-powered advisor can answer your questions about Islamic finance principles, 
@@ -809,7 +1237,7 @@ elif app_module == "Education & Advisory":
                 
                 # Sample responses based on question keywords
                 if "murabaha" in user_question.lower() and "conventional" in user_question.lower():
-                    st.markdown("""
+                    st.markdown(_("""
                     ### Murabaha vs Conventional Loan
                     
                     **Murabaha (Cost-Plus Financing):**
@@ -825,9 +1253,9 @@ elif app_module == "Education & Advisory":
                     - The interest rate may be fixed or variable
                     
                     **Key Difference:** Murabaha is asset-based with transparent profit, while conventional loans are money-based with interest.
-                    """)
+                    """, key="advisor.murabaha_vs_conventional"))
                 elif "sukuk" in user_question.lower():
-                    st.markdown("""
+                    st.markdown(_("""
                     ### Sukuk (Islamic Bonds)
                     
                     Sukuk are Sharia-compliant investment certificates that represent:
@@ -839,9 +1267,9 @@ elif app_module == "Education & Advisory":
                       - Other Sharia-compliant revenue streams
                     
                     Sukuk must be backed by tangible assets and cannot involve interest, uncertainty, or prohibited activities.
-                    """)
+                    """, key="advisor.sukuk"))
                 else:
-                    st.markdown("""
+                    st.markdown(_("""
                     ### General Islamic Finance Principles
                     
                     Islamic finance is guided by Sharia principles that prohibit:
@@ -855,10 +1283,10 @@ elif app_module == "Education & Advisory":
                     - Ethical investment screening
                     
                     Would you like more specific information about any of these principles?
-                    """)
+                    """, key="advisor.general_principles"))
     
     with tab3:
-        st.subheader("Islamic Banking Certification")
+        st.subheader(_("Islamic Banking Certification"))
         
         st.info("""
         Enhance your knowledge with our certified courses in Islamic banking and finance.
@@ -871,29 +1299,140 @@ elif app_module == "Education & Advisory":
                 "name": "Certified Islamic Finance Executive (CIFE)",
                 "level": "Professional",
                 "duration": "3 months",
-                "fee": "KES 25,000"
+                "fee": 25000
             },
             {
                 "name": "Sharia Advisory Certification",
                 "level": "Advanced",
                 "duration": "6 months",
-                "fee": "KES 45,000"
+                "fee": 45000
             },
             {
                 "name": "Islamic Banking Fundamentals",
                 "level": "Beginner",
                 "duration": "1 month",
-                "fee": "KES 10,000"
+                "fee": 10000
             }
         ]
         
+        bundle = learning.load_bundle()
+        if 'learning_progress' not in st.session_state:
+            conn = ledger.connect()
+            try:
+                st.session_state.learning_progress = learning.get_progress(
+                    conn, st.session_state.user_data['tenant_id'], st.session_state.user_data['user_id'])
+            finally:
+                conn.close()
+        eligible = learning.eligible_courses(bundle, st.session_state.learning_progress[1])
+        
         for course in courses:
             with st.expander(f"{course['name']} ({course['level']})"):
                 st.write(f"**Duration:** {course['duration']}")
-                st.write(f"**Fee:** {course['fee']}")
+                st.write(f"**Fee:** {currency.format_amount(course['fee'], display_currency)}")
+                
+                if course['name'] in eligible:
+                    st.success("Eligible for certification: all required quizzes passed")
+                else:
+                    mask = bundle['course_masks'][course['name']]
+                    remaining = [lesson['title'] for lesson in bundle['lessons']
+                                 if mask >> lesson['bit'] & 1 and not learning.is_set(st.session_state.learning_progress[1], lesson)]
+                    st.write(f"**Quizzes remaining:** {', '.join(remaining)}")
                 
                 if st.button("Enroll Now", key=f"enroll_{course['name']}"):
                     st.success(f"Successfully enrolled in {course['name']}!")
+        
+        if claims['role'] in review_queue.REVIEWER_ROLES:
+            st.subheader(_("Cohort Progress"))
+            
+            conn = ledger.connect()
+            try:
+                summary = learning.cohort_summary(conn, st.session_state.user_data['tenant_id'], bundle)
+            finally:
+                conn.close()
+            
+            st.metric("Active Learners", f"{summary['learners']:,}")
+            col1, col2 = st.columns(2)
+            with col1:
+                st.dataframe(pd.DataFrame(list(summary['lesson_passes'].items()), columns=['Lesson', 'Quizzes Passed']),
+                             use_container_width=True)
+            with col2:
+                st.dataframe(pd.DataFrame(list(summary['eligible'].items()), columns=['Course', 'Eligible Learners']),
+                             use_container_width=True)
+
+# Sharia Board Review Module
+elif app_module == "Sharia Board":
+    st.markdown(f'<h2 class="sub-header">⚖️ {_("Sharia Board Review Queue")}</h2>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="module-card">
+        <p>Review contracts submitted for Sharia Board approval. Items are ordered by priority and review deadline.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    tenant_id = st.session_state.user_data['tenant_id']
+    conn = ledger.connect()
+    try:
+        board = review_queue.reviewers(conn, tenant_id)
+        counts = review_queue.status_counts(conn, tenant_id)
+        by_status = {}
+        for status, _type, count in counts:
+            by_status[status] = by_status.get(status, 0) + count
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Pending", f"{by_status.get(review_queue.PENDING, 0):,}")
+        col2.metric("Assigned", f"{by_status.get(review_queue.ASSIGNED, 0):,}")
+        col3.metric("Overdue", f"{review_queue.overdue_count(conn, tenant_id):,}")
+        col4.metric("Decided", f"{by_status.get(review_queue.APPROVED, 0) + by_status.get(review_queue.REJECTED, 0):,}")
+        
+        if st.button("Auto-Assign Pending Reviews"):
+            assigned = review_queue.assign_pending(conn, tenant_id, list(board))
+            st.success(f"Assigned {assigned:,} contracts across {len(board)} reviewers")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            status_filter = st.selectbox("Status", ["All", review_queue.PENDING, review_queue.ASSIGNED,
+                                                    review_queue.APPROVED, review_queue.REJECTED], index=1)
+        with col2:
+            contract_types = sorted({contract_type for _status, contract_type, _count in counts})
+            type_filter = st.selectbox("Contract Type", ["All"] + contract_types)
+        with col3:
+            mine_only = st.checkbox("Only my assignments")
+        
+        items = review_queue.list_items(
+            conn, tenant_id,
+            status=None if status_filter == "All" else status_filter,
+            contract_type=None if type_filter == "All" else type_filter,
+            reviewer=st.session_state.user_data['user_id'] if mine_only else None
+        )
+        
+        if not items:
+            st.info("No contracts match these filters")
+        else:
+            queue_df = pd.DataFrame(items)
+            queue_df['overdue'] = queue_df['status'].isin(review_queue.OPEN_STATUSES) & (queue_df['due_at'] < time.time())
+            for column in ['reviewer', 'decided_by']:
+                queue_df[column] = queue_df[column].map(board).fillna(queue_df[column])
+            for column in ['submitted_at', 'due_at', 'decided_at']:
+                queue_df[column] = pd.to_datetime(queue_df[column], unit='s').dt.strftime("%Y-%m-%d %H:%M")
+            st.dataframe(queue_df, use_container_width=True)
+            
+            contract_ids = dict(zip(queue_df['id'], queue_df['contract_id']))
+            selected = st.multiselect("Select contracts", list(contract_ids), format_func=contract_ids.get)
+            decision_note = st.text_input("Decision Note")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Approve Selected") and selected:
+                    decided = review_queue.decide(conn, tenant_id, selected, review_queue.APPROVED,
+                                                  st.session_state.user_data['user_id'], decision_note, audit=audit)
+                    st.success(f"Approved {decided:,} contracts")
+            with col2:
+                if st.button("Reject Selected") and selected:
+                    decided = review_queue.decide(conn, tenant_id, selected, review_queue.REJECTED,
+                                                  st.session_state.user_data['user_id'], decision_note, audit=audit)
+                    st.warning(f"Rejected {decided:,} contracts")
+    finally:
+        conn.close()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,195 @@
+# Incremental, partitioned columnar exports of ledger and audit-log activity
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import audit_log
+import ledger
+
+EXPORT_DIR = os.path.join(ledger.DATA_DIR, "analytics")
+WATERMARK_FILE = "watermark.json"
+
+# Audit-log event types exported as their own datasets
+EVENT_DATASETS = {
+    'investments': audit_log.INVEST,
+    'zakat_payments': audit_log.PAY_ZAKAT,
+    'donations': audit_log.DONATE,
+}
+
+# References of the demo opening balances older app versions wrote to the log;
+# no money moved for them, so they are never exported
+DEMO_REFERENCES = ("Opening balance", "Opening portfolio")
+
+# Parquet for compact storage; uncompressed Arrow IPC for zero-copy memory-mapping.
+# Each format is exported to its own directory with its own watermarks.
+FORMATS = {'parquet': ".parquet", 'arrow': ".arrow"}
+EXPORT_FORMAT = os.environ.get("ISLA_EXPORT_FORMAT", "parquet")
+
+TRANSACTION_COLUMNS = ['id', 'date', 'type', 'amount', 'status', 'description',
+                       'riba', 'gharar', 'sectors', 'compliant', 'source']
+
+# Partition for stored transaction dates that are not ISO calendar days
+UNKNOWN_DATE = "unknown"
+
+
+def load_watermarks(directory=EXPORT_DIR):
+    """Last exported transaction id and audit sequence number, per tenant."""
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_watermarks(watermarks, directory=EXPORT_DIR):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, WATERMARK_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _write_table(frame, path, fmt):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    tmp = path + ".tmp"
+    if fmt == 'parquet':
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def _write_partitions(frame, directory, dataset, tenant_id, start, fmt):
+    """Write one file per date partition, named after the run's first key.
+
+    ``start`` is the key just past the watermark, which only advances once a
+    run completes. A rerun after a failed run therefore writes the same file
+    names and replaces what the failed run left behind instead of adding
+    overlapping files next to it.
+
+    Files follow the hive ``tenant=<id>/date=<day>`` layout, so readers can
+    prune partitions by path and the partition values are not repeated
+    inside each file. Transactions are partitioned by their booking date;
+    audit events by the UTC day of their timestamp, the same clock the
+    audit trail shows.
+    """
+    written = []
+    for day, part in frame.groupby('date', sort=True):
+        part_dir = os.path.join(directory, dataset, f"tenant={tenant_id}", f"date={day}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"part-{start:012d}{FORMATS[fmt]}")
+        _write_table(part.drop(columns='date'), path, fmt)
+        written.append(path)
+    return written
+
+
+def _new_transactions(conn, tenant_id, after_id):
+    cursor = conn.execute(
+        f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM transactions WHERE tenant_id = ? AND id > ? ORDER BY id",
+        (tenant_id, after_id),
+    )
+    frame = pd.DataFrame(cursor.fetchall(), columns=TRANSACTION_COLUMNS)
+    # Keep the partition key to the calendar day whatever the source format;
+    # anything that is not an ISO date goes to one partition rather than
+    # leaking separators into the path
+    days = pd.to_datetime(frame['date'].str[:10], format="%Y-%m-%d", errors='coerce')
+    frame['date'] = days.dt.strftime("%Y-%m-%d").fillna(UNKNOWN_DATE)
+    return frame
+
+
+def _new_events(log, tenant_ids, watermarks):
+    """Events after each tenant's watermark, read in one pass over the log."""
+    tenant_symbols = {tenant_id: log.symbol_id(tenant_id) for tenant_id in tenant_ids}
+    after = min(watermarks.get(tenant_id, {}).get('events', 0) for tenant_id in tenant_ids)
+    wanted = np.array(list(EVENT_DATASETS.values()), dtype=np.uint8)
+
+    blocks = []
+    last_seq = after
+    for events in log.events_after(after):
+        last_seq = int(events['seq'][-1])
+        blocks.append(events[np.isin(events['type'], wanted)])
+    events = np.concatenate(blocks) if blocks else np.zeros(0, dtype=audit_log.RECORD)
+
+    symbols = log.symbol_array()
+    demo = [symbol_id for symbol_id in map(log.symbol_id, DEMO_REFERENCES) if symbol_id is not None]
+    events = events[~np.isin(events['ref'], demo)]
+    per_tenant = {}
+    for tenant_id, symbol_id in tenant_symbols.items():
+        since = watermarks.get(tenant_id, {}).get('events', 0)
+        mine = events[(events['tenant'] == symbol_id) & (events['seq'] > since)] if symbol_id is not None else events[:0]
+        ts = pd.to_datetime(mine['ts'], unit='s', utc=True)
+        per_tenant[tenant_id] = pd.DataFrame({
+            'seq': mine['seq'].astype(np.int64),
+            'ts': ts,
+            'date': ts.strftime("%Y-%m-%d"),
+            'type': mine['type'],
+            'user_id': symbols[mine['user']],
+            'reference': symbols[mine['ref']],
+            'amount': mine['amount'],
+        })
+    return per_tenant, last_seq
+
+
+def export(conn, log, tenant_ids, directory=EXPORT_DIR, fmt=EXPORT_FORMAT):
+    """Export everything recorded since the last run for ``tenant_ids``.
+
+    Transactions come from the ledger, keyed by row id; investments, zakat
+    payments and donations come from the audit log, keyed by sequence
+    number. Only rows past each tenant's watermark are read and written, and
+    the watermark advances once every file of the run is in place.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    directory = os.path.join(directory, fmt)
+    started = time.perf_counter()
+    watermarks = load_watermarks(directory)
+    events, last_seq = _new_events(log, tenant_ids, watermarks)
+
+    stats = {'files': 0, 'rows': dict.fromkeys(['transactions', *EVENT_DATASETS], 0)}
+    for tenant_id in tenant_ids:
+        mark = watermarks.setdefault(tenant_id, {'transactions': 0, 'events': 0})
+
+        transactions = _new_transactions(conn, tenant_id, mark['transactions'])
+        if len(transactions):
+            stats['files'] += len(_write_partitions(transactions, directory, 'transactions', tenant_id,
+                                                    mark['transactions'] + 1, fmt))
+            stats['rows']['transactions'] += len(transactions)
+            mark['transactions'] = int(transactions['id'].iloc[-1])
+
+        frame = events[tenant_id]
+        for dataset, event_type in EVENT_DATASETS.items():
+            rows = frame[frame['type'] == event_type].drop(columns='type')
+            if len(rows):
+                stats['files'] += len(_write_partitions(rows, directory, dataset, tenant_id, mark['events'] + 1, fmt))
+                stats['rows'][dataset] += len(rows)
+        mark['events'] = max(mark['events'], last_seq)
+
+    save_watermarks(watermarks, directory)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def export_all(directory=EXPORT_DIR, fmt=EXPORT_FORMAT):
+    """Export every tenant in the ledger; the entry point for scheduled runs."""
+    conn = ledger.connect()
+    try:
+        tenant_ids = [row[0] for row in conn.execute("SELECT id FROM tenants ORDER BY id")] or [ledger.DEFAULT_TENANT]
+        return export(conn, audit_log.get_log(), tenant_ids, directory, fmt)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    stats = export_all(fmt=sys.argv[1] if len(sys.argv) > 1 else EXPORT_FORMAT)
+    for dataset, rows in stats['rows'].items():
+        print(f"{dataset}: {rows:,}")
+    print(f"files: {stats['files']:,}")
+    print(f"seconds: {stats['seconds']:,.2f}")
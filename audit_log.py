@@ -0,0 +1,471 @@
+# Append-only audit log of financial actions with snapshot-based replay
+import glob
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from ledger import DATA_DIR
+
+AUDIT_DIR = os.path.join(DATA_DIR, "audit")
+SEGMENT_EVENTS = 1_000_000
+SNAPSHOT_EVERY = 100_000
+SNAPSHOTS_KEPT = 2
+SNAPSHOT_VERSION = 2
+# Users whose most recent events are kept in memory between calls
+RECENT_CACHE_USERS = 10_000
+
+DEPOSIT = 1
+INVEST = 2
+PAY_ZAKAT = 3
+DONATE = 4
+SIGN_CONTRACT = 5
+SHARIA_REVIEW = 6
+SHARIA_APPROVE = 7
+SHARIA_REJECT = 8
+
+EVENT_NAMES = {
+    DEPOSIT: "Deposit",
+    INVEST: "Invest",
+    PAY_ZAKAT: "Pay Zakat",
+    DONATE: "Donation",
+    SIGN_CONTRACT: "Sign Contract",
+    SHARIA_REVIEW: "Sharia Board Review",
+    SHARIA_APPROVE: "Sharia Board Approval",
+    SHARIA_REJECT: "Sharia Board Rejection",
+}
+
+# 37-byte packed record; strings are stored once in the symbol table
+RECORD = np.dtype([
+    ('seq', '<u8'),
+    ('ts', '<f8'),
+    ('type', 'u1'),
+    ('tenant', '<u4'),
+    ('user', '<u4'),
+    ('ref', '<u4'),
+    ('amount', '<f8'),
+])
+
+STATE_FIELDS = ['savings', 'investments', 'zakat_paid', 'donations', 'contracts_signed', 'reviews_requested']
+HOLDING_FIELDS = ['holding_keys', 'holding_amounts', 'holding_last_ts']
+
+
+def _empty_state():
+    state = {'users': np.zeros(0, dtype=np.uint32)}
+    state.update({field: np.zeros(0) for field in STATE_FIELDS})
+    state['holding_keys'] = np.zeros(0, dtype=np.uint64)
+    state['holding_amounts'] = np.zeros(0)
+    state['holding_last_ts'] = np.zeros(0)
+    return state
+
+
+def _holding_keys(users, refs):
+    # One key per (user, investment) pair, sorted by user first
+    return (users.astype(np.uint64) << np.uint64(32)) | refs.astype(np.uint64)
+
+
+def _accumulate(events, users, size):
+    """Fold a block of events into per-user state arrays in one pass.
+
+    ``users`` holds each event's row in the state arrays.
+    """
+    kind = events['type']
+    amount = events['amount']
+
+    def total(mask, weights):
+        # bincount returns integers when nothing is selected
+        return np.bincount(users[mask], weights=weights[mask], minlength=size).astype(np.float64, copy=False)
+
+    spent = np.isin(kind, (INVEST, PAY_ZAKAT, DONATE))
+    ones = np.ones(len(events))
+    return {
+        'savings': total(kind == DEPOSIT, amount) - total(spent, amount),
+        'investments': total(kind == INVEST, amount),
+        'zakat_paid': total(kind == PAY_ZAKAT, amount),
+        'donations': total(kind == DONATE, amount),
+        'contracts_signed': total(kind == SIGN_CONTRACT, ones),
+        'reviews_requested': total(kind == SHARIA_REVIEW, ones),
+    }
+
+
+class EventLog:
+    """Segmented binary event log with periodic state snapshots.
+
+    Events are fixed-size records appended to ``segment-<first seq>.bin``
+    files; a new segment starts every ``segment_events`` events. Every
+    ``snapshot_every`` events the folded per-user state is written to
+    ``snapshot-<seq>.npz`` so replay only reads the events after it.
+
+    State rows exist only for users with events, so references such as
+    contract ids do not grow the snapshots. Each instance also keeps the
+    latest folded state and a bounded cache of every recently seen user's
+    newest events, so sign-ins and Dashboard reruns only read the tail of
+    the log.
+    """
+
+    def __init__(self, directory=AUDIT_DIR, segment_events=SEGMENT_EVENTS, snapshot_every=SNAPSHOT_EVERY):
+        self.directory = directory
+        self.segment_events = segment_events
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._recent_lock = threading.Lock()
+        self._recent = OrderedDict()
+        self._current = None
+        os.makedirs(directory, exist_ok=True)
+        self._symbols_path = os.path.join(directory, "symbols.jsonl")
+        self._load_symbols()
+        self._next_seq = self._recover_next_seq()
+
+    # Symbols
+
+    def _load_symbols(self):
+        self._symbols = []
+        self._symbol_ids = {}
+        if os.path.exists(self._symbols_path):
+            with open(self._symbols_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._add_symbol(json.loads(line))
+
+    def _add_symbol(self, text):
+        self._symbol_ids[text] = len(self._symbols)
+        self._symbols.append(text)
+        return self._symbol_ids[text]
+
+    def _symbol(self, text):
+        text = text or ""
+        if text in self._symbol_ids:
+            return self._symbol_ids[text]
+        with open(self._symbols_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(text, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        return self._add_symbol(text)
+
+    def symbol_text(self, symbol_id):
+        return self._symbols[symbol_id]
+
+    def symbol_id(self, text):
+        return self._symbol_ids.get(text)
+
+    def symbol_array(self):
+        """Every symbol in id order, for vectorized id-to-text lookups."""
+        return np.array(self._symbols, dtype=object)
+
+    # Segments
+
+    def _segments(self):
+        paths = sorted(glob.glob(os.path.join(self.directory, "segment-*.bin")))
+        return [(int(os.path.basename(p)[8:-4]), p) for p in paths]
+
+    def _recover_next_seq(self):
+        segments = self._segments()
+        if not segments:
+            return 1
+        first_seq, path = segments[-1]
+        size = os.path.getsize(path)
+        if size % RECORD.itemsize:
+            # Drop a record torn by a crash mid-write
+            with open(path, "r+b") as f:
+                f.truncate(size - size % RECORD.itemsize)
+        return first_seq + os.path.getsize(path) // RECORD.itemsize
+
+    def _segment_path(self, seq):
+        segments = self._segments()
+        if segments:
+            first_seq, path = segments[-1]
+            if seq - first_seq < self.segment_events:
+                return path
+        return os.path.join(self.directory, f"segment-{seq:012d}.bin")
+
+    def _write(self, records):
+        """Write records starting at self._next_seq, rolling segments as needed."""
+        start = 0
+        while start < len(records):
+            seq = int(records['seq'][start])
+            path = self._segment_path(seq)
+            first_seq = int(os.path.basename(path)[8:-4])
+            room = self.segment_events - (seq - first_seq)
+            chunk = records[start:start + room]
+            with open(path, "ab") as f:
+                f.write(chunk.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            start += len(chunk)
+
+    def append(self, event_type, tenant, user, amount=0.0, ref=""):
+        """Durably append one event and return its sequence number."""
+        with self._lock:
+            record = np.zeros(1, dtype=RECORD)
+            record['seq'] = self._next_seq
+            record['ts'] = time.time()
+            record['type'] = event_type
+            record['tenant'] = self._symbol(tenant)
+            record['user'] = self._symbol(user)
+            record['ref'] = self._symbol(ref)
+            record['amount'] = amount
+            self._write(record)
+            self._next_seq += 1
+            if (self._next_seq - 1) % self.snapshot_every == 0:
+                self._snapshot()
+            return int(record['seq'][0])
+
+    def append_many(self, events):
+        """Durably append (event_type, tenant, user, amount, ref) tuples with one write."""
+        if not events:
+            return
+        with self._lock:
+            records = np.zeros(len(events), dtype=RECORD)
+            records['ts'] = time.time()
+            records['type'] = [event[0] for event in events]
+            records['tenant'] = [self._symbol(event[1]) for event in events]
+            records['user'] = [self._symbol(event[2]) for event in events]
+            records['amount'] = [event[3] for event in events]
+            records['ref'] = [self._symbol(event[4]) for event in events]
+        self.append_records(records)
+
+    def append_records(self, records):
+        """Bulk-append pre-built RECORD rows, assigning sequence numbers."""
+        with self._lock:
+            records = records.copy()
+            records['seq'] = np.arange(self._next_seq, self._next_seq + len(records), dtype=np.uint64)
+            self._write(records)
+            before = self._next_seq - 1
+            self._next_seq += len(records)
+            if (self._next_seq - 1) // self.snapshot_every > before // self.snapshot_every:
+                self._snapshot()
+
+    def last_seq(self):
+        return self._next_seq - 1
+
+    def events_after(self, seq):
+        """Yield arrays of events with sequence numbers greater than ``seq``.
+
+        Records are fixed-size and numbered consecutively within a segment,
+        so reading starts at the byte offset of ``seq + 1``.
+        """
+        segments = self._segments()
+        for i, (first_seq, path) in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1][0] <= seq + 1:
+                continue
+            skip = max(seq + 1 - first_seq, 0)
+            events = np.fromfile(path, dtype=RECORD, offset=skip * RECORD.itemsize)
+            if len(events):
+                yield events
+
+    # Snapshots and replay
+
+    def _snapshot_paths(self):
+        return sorted(glob.glob(os.path.join(self.directory, "snapshot-*.npz")))
+
+    def _latest_snapshot(self):
+        for path in reversed(self._snapshot_paths()):
+            with np.load(path) as data:
+                # Older snapshots lack holdings, so replay from an earlier point
+                if 'version' in data and int(data['version']) == SNAPSHOT_VERSION:
+                    return int(data['seq']), {key: data[key] for key in _empty_state()}
+        return 0, _empty_state()
+
+    def _fold(self, seq, state, events):
+        """Return the state with ``events`` applied; ``state`` is not modified."""
+        size = max(len(self._symbols), int(events['user'].max()) + 1, int(state['users'][-1]) + 1 if len(state['users']) else 0)
+        present = np.bincount(events['user'], minlength=size) > 0
+        present[state['users']] = True
+        users = np.flatnonzero(present).astype(np.uint32)
+        row = np.zeros(size, dtype=np.intp)
+        row[users] = np.arange(len(users))
+
+        delta = _accumulate(events, row[events['user']], len(users))
+        folded = {'users': users}
+        for field in STATE_FIELDS:
+            folded[field] = delta[field]
+            folded[field][row[state['users']]] += state[field]
+
+        invested = events[events['type'] == INVEST]
+        block_keys, inverse = np.unique(_holding_keys(invested['user'], invested['ref']), return_inverse=True)
+        block_amounts = np.bincount(inverse, weights=invested['amount'], minlength=len(block_keys))
+        block_last_ts = np.zeros(len(block_keys))
+        np.maximum.at(block_last_ts, inverse, invested['ts'])
+
+        keys = np.union1d(state['holding_keys'], block_keys)
+        old = np.searchsorted(keys, state['holding_keys'])
+        new = np.searchsorted(keys, block_keys)
+        folded['holding_keys'] = keys
+        folded['holding_amounts'] = np.zeros(len(keys))
+        folded['holding_amounts'][old] = state['holding_amounts']
+        folded['holding_amounts'][new] += block_amounts
+        folded['holding_last_ts'] = np.zeros(len(keys))
+        folded['holding_last_ts'][old] = state['holding_last_ts']
+        folded['holding_last_ts'][new] = np.maximum(folded['holding_last_ts'][new], block_last_ts)
+        return int(events['seq'][-1]), folded
+
+    def replay(self):
+        """Rebuild every user's state from the latest snapshot forward."""
+        seq, state = self._latest_snapshot()
+        for events in self.events_after(seq):
+            seq, state = self._fold(seq, state, events)
+        return seq, state
+
+    def current_state(self):
+        """Latest state, folding only the events since the previous call."""
+        current = self._current
+        seq, state = current if current is not None else self._latest_snapshot()
+        for events in self.events_after(seq):
+            seq, state = self._fold(seq, state, events)
+        self._current = (seq, state)
+        return seq, state
+
+    def _snapshot(self):
+        seq, state = self.current_state()
+        path = os.path.join(self.directory, f"snapshot-{seq:012d}.npz")
+        tmp = os.path.join(self.directory, f"tmp-snapshot-{seq:012d}.npz")
+        np.savez(tmp, seq=seq, version=SNAPSHOT_VERSION, **state)
+        os.replace(tmp, path)
+        for old in self._snapshot_paths()[:-SNAPSHOTS_KEPT]:
+            os.remove(old)
+
+    def _user_row(self, state, user):
+        symbol_id = self._symbol_ids.get(user)
+        if symbol_id is None:
+            return None, None
+        row = int(np.searchsorted(state['users'], symbol_id))
+        if row == len(state['users']) or state['users'][row] != symbol_id:
+            return symbol_id, None
+        return symbol_id, row
+
+    def user_state(self, user):
+        """Balance and compliance state for one user."""
+        _, state = self.current_state()
+        _, row = self._user_row(state, user)
+        if row is None:
+            return {field: 0.0 for field in STATE_FIELDS}
+        return {field: float(state[field][row]) for field in STATE_FIELDS}
+
+    def user_holdings(self, user):
+        """Total invested per investment for one user, with the latest purchase time."""
+        _, state = self.current_state()
+        symbol_id, _ = self._user_row(state, user)
+        if symbol_id is None:
+            return []
+        keys = state['holding_keys']
+        start, end = np.searchsorted(keys, [symbol_id << 32, (symbol_id + 1) << 32])
+        return [
+            {
+                'name': self._symbols[int(keys[i]) & 0xFFFFFFFF],
+                'amount': float(state['holding_amounts'][i]),
+                'last_invested': float(state['holding_last_ts'][i]),
+            }
+            for i in range(start, end)
+        ]
+
+    def _scan_user(self, symbol_id, limit, upto):
+        """Newest ``limit`` events of one user with seq <= ``upto``, scanning segments newest first."""
+        matches = []
+        found = 0
+        for _, path in reversed(self._segments()):
+            events = np.fromfile(path, dtype=RECORD)
+            events = events[(events['user'] == symbol_id) & (events['seq'] <= upto)][::-1]
+            matches.append(events)
+            found += len(events)
+            if found >= limit:
+                break
+        return np.concatenate(matches)[:limit] if matches else np.zeros(0, dtype=RECORD)
+
+    def _recent_events(self, symbol_id, limit):
+        with self._recent_lock:
+            cached = self._recent.get(symbol_id)
+        if cached is None or cached[2] < limit:
+            seen = self.last_seq()
+            events = self._scan_user(symbol_id, limit, seen)
+            cached_limit = limit
+        else:
+            seen, events, cached_limit = cached
+            newer = []
+            for block in self.events_after(seen):
+                seen = int(block['seq'][-1])
+                newer.append(block[block['user'] == symbol_id][::-1])
+            if newer:
+                events = np.concatenate(newer[::-1] + [events])[:cached_limit]
+        with self._recent_lock:
+            self._recent[symbol_id] = (seen, events, cached_limit)
+            self._recent.move_to_end(symbol_id)
+            if len(self._recent) > RECENT_CACHE_USERS:
+                self._recent.popitem(last=False)
+        return events[:limit]
+
+    def user_events(self, user, limit=50):
+        """Most recent events for one user, newest first.
+
+        The first call for a user scans segments newest first until enough
+        events are found; later calls only read events appended since.
+        """
+        symbol_id = self._symbol_ids.get(user)
+        if symbol_id is None:
+            return []
+        matches = self._recent_events(symbol_id, limit)
+        return [
+            {
+                'seq': int(e['seq']),
+                'time': time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime(e['ts'])),
+                'event': EVENT_NAMES.get(int(e['type']), str(e['type'])),
+                'amount': float(e['amount']),
+                'reference': self._symbols[e['ref']],
+            }
+            for e in matches[:limit]
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_log(directory=AUDIT_DIR):
+    """One EventLog per process, shared by every Streamlit session."""
+    return EventLog(directory)
+
+
+def benchmark_replay(n_events=5_000_000, n_users=10_000, snapshot_every=SNAPSHOT_EVERY):
+    """Time a full replay from genesis and from the latest snapshot.
+
+    Returns events per minute for each, using a throwaway log directory.
+    """
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as directory:
+        log = EventLog(directory, snapshot_every=n_events * 2)
+        for i in range(n_users):
+            log._symbol(f"user-{i}")
+        records = np.zeros(n_events, dtype=RECORD)
+        records['ts'] = time.time()
+        records['type'] = rng.integers(DEPOSIT, SHARIA_REVIEW + 1, n_events)
+        records['user'] = rng.integers(0, n_users, n_events)
+        records['amount'] = rng.uniform(100, 10000, n_events)
+        log.append_records(records)
+
+        started = time.perf_counter()
+        log.replay()
+        genesis = time.perf_counter() - started
+
+        log._snapshot()
+        tail = records[:snapshot_every]
+        log.append_records(tail)
+        started = time.perf_counter()
+        log.replay()
+        from_snapshot = time.perf_counter() - started
+
+    return {
+        'events': n_events,
+        'genesis_seconds': genesis,
+        'genesis_events_per_minute': n_events / genesis * 60,
+        'snapshot_tail_events': len(tail),
+        'snapshot_seconds': from_snapshot,
+        'snapshot_events_per_minute': len(tail) / from_snapshot * 60,
+    }
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    for key, value in benchmark_replay(n).items():
+        print(f"{key}: {value:,.2f}" if isinstance(value, float) else f"{key}: {value:,}")
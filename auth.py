@@ -0,0 +1,225 @@
+# Login, JWT sessions and tenant lookup for multi-bank deployments
+import argparse
+import getpass
+import os
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+
+import jwt
+from passlib.context import CryptContext
+
+import ledger
+
+TOKEN_TTL = 8 * 60 * 60
+CLAIMS_CACHE_SIZE = 10000
+JWT_ALGORITHM = "HS256"
+JWT_ISSUER = "baraka-fintech"
+SECRET_PATH = os.path.join(ledger.DATA_DIR, "jwt_secret")
+
+DEFAULT_TENANTS = [
+    ('baraka', "Baraka Islamic Bank"),
+]
+TENANT_ID_PATTERN = re.compile(r"[a-z0-9][a-z0-9-]{1,31}")
+ROLES = ("customer", "sharia_board", "admin")
+
+pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+_claims_lock = threading.Lock()
+_claims_cache = OrderedDict()
+
+
+class AuthError(Exception):
+    pass
+
+
+@lru_cache(maxsize=1)
+def _signing_secret():
+    """Load the HMAC secret once per process, creating it on first run."""
+    secret = os.environ.get("ISLA_JWT_SECRET")
+    if secret:
+        return secret
+    if os.path.exists(SECRET_PATH):
+        with open(SECRET_PATH) as f:
+            return f.read().strip()
+    os.makedirs(os.path.dirname(SECRET_PATH) or ".", exist_ok=True)
+    secret = secrets.token_urlsafe(48)
+    with os.fdopen(os.open(SECRET_PATH, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+        f.write(secret)
+    return secret
+
+
+def _decode(token):
+    return jwt.decode(token, _signing_secret(), algorithms=[JWT_ALGORITHM], issuer=JWT_ISSUER,
+                      options={"require": ["exp", "sub", "tenant"]})
+
+
+def verify_token(token):
+    """Return the claims for ``token`` or raise AuthError.
+
+    Verified claims are kept in a bounded in-process cache until the token
+    expires, so a Streamlit rerun costs one dictionary lookup.
+    """
+    now = time.time()
+    with _claims_lock:
+        claims = _claims_cache.get(token)
+        if claims is not None:
+            if claims['exp'] > now:
+                _claims_cache.move_to_end(token)
+                return claims
+            del _claims_cache[token]
+    try:
+        claims = _decode(token)
+    except jwt.PyJWTError as e:
+        raise AuthError(str(e)) from None
+    with _claims_lock:
+        _claims_cache[token] = claims
+        if len(_claims_cache) > CLAIMS_CACHE_SIZE:
+            _claims_cache.popitem(last=False)
+    return claims
+
+
+def revoke_cached(token):
+    with _claims_lock:
+        _claims_cache.pop(token, None)
+
+
+def issue_token(user):
+    now = int(time.time())
+    claims = {
+        'iss': JWT_ISSUER,
+        'sub': user['id'],
+        'tenant': user['tenant_id'],
+        'tenant_name': user['tenant_name'],
+        'name': user['display_name'],
+        'role': user['role'],
+        'iat': now,
+        'exp': now + TOKEN_TTL,
+    }
+    return jwt.encode(claims, _signing_secret(), algorithm=JWT_ALGORITHM)
+
+
+def ensure_tenants(conn):
+    if conn.execute("SELECT COUNT(*) FROM tenants").fetchone()[0] == 0:
+        conn.executemany("INSERT INTO tenants (id, name) VALUES (?, ?)", DEFAULT_TENANTS)
+        conn.commit()
+
+
+def list_tenants(conn):
+    ensure_tenants(conn)
+    return conn.execute("SELECT id, name FROM tenants ORDER BY name").fetchall()
+
+
+def create_tenant(conn, tenant_id, name):
+    """Register another bank on this deployment."""
+    if not TENANT_ID_PATTERN.fullmatch(tenant_id or ""):
+        raise AuthError("Bank IDs are 2-32 lowercase letters, digits or hyphens")
+    if not (name or "").strip():
+        raise AuthError("Bank name is required")
+    ensure_tenants(conn)
+    if conn.execute("SELECT 1 FROM tenants WHERE id = ?", (tenant_id,)).fetchone():
+        raise AuthError(f"Bank already exists: {tenant_id}")
+    conn.execute("INSERT INTO tenants (id, name) VALUES (?, ?)", (tenant_id, name.strip()))
+    conn.commit()
+
+
+def create_user(conn, tenant_id, username, password, display_name, role="customer"):
+    if role not in ROLES:
+        raise AuthError(f"Unknown role: {role}")
+    if len(password) < 8:
+        raise AuthError("Password must be at least 8 characters")
+    if conn.execute("SELECT 1 FROM tenants WHERE id = ?", (tenant_id,)).fetchone() is None:
+        raise AuthError(f"Unknown bank: {tenant_id}")
+    exists = conn.execute(
+        "SELECT 1 FROM users WHERE tenant_id = ? AND username = ?", (tenant_id, username)
+    ).fetchone()
+    if exists:
+        raise AuthError("Username already taken")
+    user_id = uuid.uuid4().hex
+    conn.execute(
+        "INSERT INTO users (id, tenant_id, username, password_hash, display_name, role) VALUES (?, ?, ?, ?, ?, ?)",
+        (user_id, tenant_id, username, pwd_context.hash(password), display_name, role),
+    )
+    conn.commit()
+    return user_id
+
+
+def set_role(conn, tenant_id, username, role):
+    """Grant an existing account a role; admins are only provisioned this way or via the CLI."""
+    if role not in ROLES:
+        raise AuthError(f"Unknown role: {role}")
+    updated = conn.execute(
+        "UPDATE users SET role = ? WHERE tenant_id = ? AND username = ?", (role, tenant_id, username)
+    ).rowcount
+    if not updated:
+        raise AuthError(f"Unknown user: {username}")
+    conn.commit()
+
+
+def login(conn, tenant_id, username, password):
+    """Check credentials and return a signed session token."""
+    row = conn.execute(
+        """
+        SELECT users.id, users.tenant_id, tenants.name, users.password_hash, users.display_name, users.role
+        FROM users JOIN tenants ON tenants.id = users.tenant_id
+        WHERE users.tenant_id = ? AND users.username = ?
+        """,
+        (tenant_id, username),
+    ).fetchone()
+    if row is None or not pwd_context.verify(password, row[3]):
+        raise AuthError("Invalid username or password")
+    return issue_token({
+        'id': row[0],
+        'tenant_id': row[1],
+        'tenant_name': row[2],
+        'display_name': row[4],
+        'role': row[5],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage banks and their staff accounts on this deployment.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    add = commands.add_parser('create-tenant', help="register a bank")
+    add.add_argument('tenant_id')
+    add.add_argument('name')
+    commands.add_parser('list-tenants', help="list registered banks")
+    user = commands.add_parser('create-user', help="provision an account, e.g. a bank's admin "
+                               "(password from ISLA_USER_PASSWORD or prompted)")
+    user.add_argument('tenant_id')
+    user.add_argument('username')
+    user.add_argument('--name', help="display name (defaults to the username)")
+    user.add_argument('--role', choices=ROLES, default='admin')
+    grant = commands.add_parser('set-role', help="change an existing account's role")
+    grant.add_argument('tenant_id')
+    grant.add_argument('username')
+    grant.add_argument('role', choices=ROLES)
+    args = parser.parse_args(argv)
+
+    conn = ledger.connect()
+    try:
+        ensure_tenants(conn)
+        if args.command == 'create-user':
+            password = os.environ.get("ISLA_USER_PASSWORD") or getpass.getpass("Password: ")
+            create_user(conn, args.tenant_id, args.username, password, args.name or args.username, args.role)
+            print(f"{args.tenant_id}\t{args.username}\t{args.role}")
+        elif args.command == 'set-role':
+            set_role(conn, args.tenant_id, args.username, args.role)
+            print(f"{args.tenant_id}\t{args.username}\t{args.role}")
+        else:
+            if args.command == 'create-tenant':
+                create_tenant(conn, args.tenant_id, args.name)
+            for tenant_id, name in list_tenants(conn):
+                print(f"{tenant_id}\t{name}")
+    except AuthError as e:
+        parser.exit(1, f"error: {e}\n")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
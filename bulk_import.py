@@ -0,0 +1,280 @@
+# Bulk import of bank statement files (CSV, JSON lines, OFX) into the ledger
+import csv
+import io
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import ledger
+from compliance import screen_batch
+
+BATCH_SIZE = 5000
+# Below this file size the process pool costs more than it saves
+MIN_PARALLEL_BYTES = 2_000_000
+
+DATE_COLUMNS = ["date", "transaction date", "posting date", "value date"]
+DESCRIPTION_COLUMNS = ["description", "narration", "details", "memo", "particulars", "name"]
+AMOUNT_COLUMNS = ["amount", "value"]
+TYPE_COLUMNS = ["type", "transaction type", "category"]
+# Day-first and month-first dates overlap; each file must settle on one format
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%d %b %Y")
+
+# A tag and the text up to the next tag; SGML leaf elements have no closing tag
+OFX_TOKEN = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+OFX_CHUNK = 64 * 1024
+
+
+def _normalize_date(value, formats=DATE_FORMATS):
+    """Normalize ``value`` under each of ``formats`` that parses it, as {format: ISO date}."""
+    value = (value or "").strip()
+    # OFX dates look like 20231001120000[0:GMT]
+    if len(value) >= 8 and value[:8].isdigit():
+        return dict.fromkeys(formats, f"{value[:4]}-{value[4:6]}-{value[6:8]}")
+    parsed = {}
+    for fmt in formats:
+        try:
+            parsed[fmt] = datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    if not parsed:
+        raise ValueError(f"unrecognised date {value!r}")
+    return parsed
+
+
+def _parse_amount(value):
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).replace(",", "").replace("KES", "").strip())
+
+
+def _pick(record, columns, default=""):
+    for column in columns:
+        if column in record and record[column] not in (None, ""):
+            return record[column]
+    return default
+
+
+def _make_row(record, source, line):
+    """Build a ledger row from one record, leaving its date unparsed for ``_resolve_dates``."""
+    if not isinstance(record, dict):
+        raise ValueError(f"{source} line {line}: expected an object")
+    record = {str(k).strip().lower(): v for k, v in record.items()}
+    try:
+        if "debit" in record or "credit" in record:
+            amount = _parse_amount(record.get("credit")) - _parse_amount(record.get("debit"))
+        else:
+            amount = _parse_amount(_pick(record, AMOUNT_COLUMNS, 0))
+    except ValueError as e:
+        raise ValueError(f"{source} line {line}: {e}") from None
+    return {
+        'date': str(_pick(record, DATE_COLUMNS)),
+        'type': str(_pick(record, TYPE_COLUMNS, "Imported")),
+        'amount': amount,
+        'status': str(record.get("status") or "Completed"),
+        'description': str(_pick(record, DESCRIPTION_COLUMNS)),
+        'source': source,
+    }
+
+
+def _resolve_dates(rows, source):
+    """Normalize the dates of (row, line) pairs with one date format for the whole file.
+
+    Each date narrows the formats the file can be in. Rows are held back
+    while their dates read differently under the formats still possible,
+    as 03/04/2023 does day-first and month-first, and released once a later
+    date settles it. A file that never settles is rejected rather than
+    guessed.
+    """
+    formats = DATE_FORMATS
+    held = deque()
+    for row, line in rows:
+        try:
+            parsed = _normalize_date(row['date'], formats)
+        except ValueError as e:
+            raise ValueError(f"{source} line {line}: {e}") from None
+        formats = tuple(parsed)
+        held.append((row, line, parsed))
+        if len(set(parsed.values())) == 1 and len(held) == 1:
+            # Reads the same in every remaining format; nothing to wait for
+            row['date'] = held.popleft()[2][formats[0]]
+            yield row
+        elif len(formats) == 1:
+            while held:
+                row, _, parsed = held.popleft()
+                row['date'] = parsed[formats[0]]
+                yield row
+    for row, line, parsed in held:
+        if len({parsed[fmt] for fmt in formats}) > 1:
+            raise ValueError(f"{source} line {line}: ambiguous date {row['date']!r}; "
+                             f"the file's dates do not show whether it is day- or month-first")
+    for row, _, parsed in held:
+        row['date'] = parsed[formats[0]]
+        yield row
+
+
+def parse_csv(stream, source="csv"):
+    reader = csv.DictReader(stream)
+    yield from _resolve_dates(((_make_row(record, source, reader.line_num), reader.line_num) for record in reader), source)
+
+
+def _jsonl_rows(stream, source):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{source} line {number}: {e}") from None
+            yield _make_row(record, source, number), number
+
+
+def parse_jsonl(stream, source="jsonl"):
+    yield from _resolve_dates(_jsonl_rows(stream, source), source)
+
+
+def _ofx_tokens(stream, chunk_size=OFX_CHUNK):
+    """Yield (line, closing, tag, text) for every tag in an OFX stream.
+
+    The stream is read in fixed-size chunks rather than by line, so OFX 2.x
+    exports written on a single line are tokenized the same way as SGML
+    files with one tag per line.
+    """
+    buffer = ""
+    line = 1
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+        # Text after the last '<' may continue in the next chunk
+        end = buffer.rfind("<") if chunk else len(buffer)
+        end = max(end, 0)
+        position = 0
+        for match in OFX_TOKEN.finditer(buffer, 0, end):
+            line += buffer.count("\n", position, match.start())
+            position = match.start()
+            yield line, match.group(1) == "/", match.group(2).upper(), match.group(3).strip()
+        line += buffer.count("\n", position, end)
+        buffer = buffer[end:]
+        if not chunk:
+            return
+
+
+def _ofx_rows(stream, source):
+    current = None
+    started = 0
+    for line, closing, tag, value in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            if closing and current is not None:
+                description = " ".join(filter(None, [current.get("NAME"), current.get("MEMO")]))
+                yield _make_row({
+                    'date': current.get("DTPOSTED"),
+                    'amount': current.get("TRNAMT"),
+                    'type': current.get("TRNTYPE", "Imported").title(),
+                    'description': description,
+                }, source, started), started
+                current = None
+            elif not closing:
+                current = {}
+                started = line
+        elif current is not None and not closing:
+            current[tag] = value
+
+
+def parse_ofx(stream, source="ofx"):
+    """Yield one row per <STMTTRN> block, streaming the file in chunks."""
+    yield from _resolve_dates(_ofx_rows(stream, source), source)
+
+
+PARSERS = {
+    '.csv': parse_csv,
+    '.jsonl': parse_jsonl,
+    '.ndjson': parse_jsonl,
+    '.ofx': parse_ofx,
+    '.qfx': parse_ofx,
+}
+
+
+def detect_parser(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    if ext not in PARSERS:
+        raise ValueError(f"Unsupported statement format: {ext or filename}")
+    return PARSERS[ext]
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_rows(rows, conn, tenant_id=ledger.DEFAULT_TENANT, user_id=None, workers=None, batch_size=BATCH_SIZE):
+    """Screen and insert an iterable of rows, returning throughput stats.
+
+    Batches are screened across a process pool and written with one
+    executemany per batch. At most ``2 * workers`` batches are in flight so
+    memory stays bounded however large the statement is. The whole import
+    is one transaction: a bad row anywhere rolls back every batch before it,
+    so a corrected file can be imported again without duplicates.
+    """
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    started = time.perf_counter()
+    total = flagged = 0
+
+    def write(batch):
+        nonlocal total, flagged
+        ledger.insert_transactions(conn, batch, tenant_id=tenant_id, user_id=user_id, commit=False)
+        total += len(batch)
+        flagged += sum(1 for row in batch if not row['compliant'])
+
+    batches = _batches(rows, batch_size)
+    try:
+        if workers <= 1:
+            for batch in batches:
+                write(screen_batch(batch))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for batch in batches:
+                    pending.append(pool.submit(screen_batch, batch))
+                    if len(pending) >= workers * 2:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': total,
+        'flagged': flagged,
+        'seconds': elapsed,
+        'rows_per_sec': total / elapsed if elapsed > 0 else float(total),
+    }
+
+
+def import_statement(filename, data, conn=None, tenant_id=ledger.DEFAULT_TENANT, user_id=None, workers=None):
+    """Import an uploaded statement given its filename and raw bytes, owned by ``user_id``."""
+    parser = detect_parser(filename)
+    stream = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+    if workers is None and len(data) < MIN_PARALLEL_BYTES:
+        workers = 1
+    own_conn = conn is None
+    conn = conn or ledger.connect()
+    try:
+        return import_rows(parser(stream, source=os.path.basename(filename)), conn,
+                           tenant_id=tenant_id, user_id=user_id, workers=workers)
+    finally:
+        if own_conn:
+            conn.close()
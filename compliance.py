@@ -0,0 +1,29 @@
+# Keyword-based Sharia screening shared by the app and the bulk importer
+
+RIBA_KEYWORDS = ["interest"]
+GHARAR_KEYWORDS = ["uncertain", "speculative"]
+PROHIBITED_SECTORS = ["alcohol", "gambling", "pork", "casino", "tobacco"]
+
+
+def screen_description(text):
+    """Return the riba/gharar flags and prohibited sectors found in a description."""
+    text = (text or "").lower()
+    return {
+        'riba': any(keyword in text for keyword in RIBA_KEYWORDS),
+        'gharar': any(keyword in text for keyword in GHARAR_KEYWORDS),
+        'sectors': [sector for sector in PROHIBITED_SECTORS if sector in text],
+    }
+
+
+def screen_batch(rows):
+    """Screen a list of transaction rows in place and return it.
+
+    Runs inside worker processes, so it only takes and returns plain data.
+    """
+    for row in rows:
+        result = screen_description(row['description'])
+        row['riba'] = int(result['riba'])
+        row['gharar'] = int(result['gharar'])
+        row['sectors'] = ",".join(result['sectors'])
+        row['compliant'] = int(not (result['riba'] or result['gharar'] or result['sectors']))
+    return rows
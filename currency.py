@@ -0,0 +1,149 @@
+# FX rate table and vectorized currency conversion
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from ledger import DATA_DIR
+
+BASE_CURRENCY = "KES"
+RATES_PATH = os.path.join(DATA_DIR, "fx_rates.json")
+RATES_URL = os.environ.get("ISLA_FX_RATES_URL")
+RATES_TTL = 15 * 60
+
+# Units of KES per unit of each currency, used when no rate file is available
+DEFAULT_RATES = {
+    "KES": 1.0,
+    "USD": 129.0,
+    "EUR": 140.0,
+    "GBP": 164.0,
+    "AED": 35.1,
+    "SAR": 34.4,
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cache = {'loaded_at': 0.0, 'codes': None, 'index': None, 'matrix': None, 'refreshing': False}
+
+
+def rates_to_base(payload):
+    """Convert a ``{"base": ..., "rates": {...}}`` quote to KES per unit.
+
+    Feeds and rate files quote units of each currency per one unit of
+    ``base``, e.g. ``{"base": "USD", "rates": {"KES": 129}}``. Payloads
+    without a base, without a KES quote or with non-positive rates are
+    rejected.
+    """
+    base = payload.get('base') if isinstance(payload, dict) else None
+    rates = payload.get('rates') if isinstance(payload, dict) else None
+    if not base or not isinstance(rates, dict):
+        raise ValueError("FX rates need a 'base' currency and a 'rates' table")
+    quotes = {str(code).upper(): float(rate) for code, rate in rates.items()}
+    quotes[str(base).upper()] = 1.0
+    if BASE_CURRENCY not in quotes:
+        raise ValueError(f"FX rates have no {BASE_CURRENCY} quote")
+    invalid = sorted(code for code, rate in quotes.items() if not rate > 0)
+    if invalid:
+        raise ValueError(f"FX rates must be positive: {', '.join(invalid)}")
+    return {code: quotes[BASE_CURRENCY] / rate for code, rate in quotes.items()}
+
+
+def _read_rates():
+    if RATES_URL:
+        try:
+            import requests
+
+            response = requests.get(RATES_URL, timeout=5)
+            response.raise_for_status()
+            return rates_to_base(response.json())
+        except Exception as e:
+            # Fall through to the local stand-in when offline
+            logger.warning("Could not load FX rates from %s: %s", RATES_URL, e)
+    if os.path.exists(RATES_PATH):
+        try:
+            with open(RATES_PATH) as f:
+                return rates_to_base(json.load(f))
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring FX rate file %s: %s", RATES_PATH, e)
+    return DEFAULT_RATES
+
+
+def _build(rates):
+    codes = sorted(rates)
+    to_base = np.array([float(rates[code]) for code in codes])
+    # matrix[i, j] converts one unit of codes[i] into codes[j]
+    matrix = to_base[:, None] / to_base[None, :]
+    return codes, {code: i for i, code in enumerate(codes)}, matrix
+
+
+def rate_table(ttl=RATES_TTL):
+    """Return (codes, index, matrix), reloading the rates once the TTL expires.
+
+    Rates are fetched outside the lock by whichever caller finds them stale;
+    other sessions keep using the previous table until the refresh lands.
+    """
+    with _lock:
+        current = _cache['matrix'] is not None
+        stale = not current or time.monotonic() - _cache['loaded_at'] > ttl
+        if current and (not stale or _cache['refreshing']):
+            return _cache['codes'], _cache['index'], _cache['matrix']
+        _cache['refreshing'] = True
+    try:
+        codes, index, matrix = _build(_read_rates())
+    finally:
+        with _lock:
+            _cache['refreshing'] = False
+    with _lock:
+        _cache.update(loaded_at=time.monotonic(), codes=codes, index=index, matrix=matrix)
+        return codes, index, matrix
+
+
+def currencies():
+    return rate_table()[0]
+
+
+def _indices(index, codes):
+    try:
+        if isinstance(codes, str):
+            return index[codes]
+        # Map each distinct code once and broadcast back over the array
+        unique, inverse = np.unique(np.asarray(codes, dtype=str), return_inverse=True)
+        return np.array([index[code] for code in unique])[inverse]
+    except KeyError as e:
+        raise ValueError(f"Unknown currency: {e.args[0]}") from None
+
+
+def convert(amounts, from_currency=BASE_CURRENCY, to_currency=BASE_CURRENCY):
+    """Convert a scalar or array of amounts in one vectorized lookup.
+
+    ``from_currency`` and ``to_currency`` may each be a single code or an
+    array of codes the same length as ``amounts``.
+    """
+    _, index, matrix = rate_table()
+    factors = matrix[_indices(index, from_currency), _indices(index, to_currency)]
+    return np.asarray(amounts, dtype=np.float64) * factors
+
+
+def convert_frame(df, columns, to_currency, currency_column=None, from_currency=BASE_CURRENCY):
+    """Return a copy of ``df`` with ``columns`` converted to ``to_currency``."""
+    source = df[currency_column].to_numpy() if currency_column else from_currency
+    _, index, matrix = rate_table()
+    factors = matrix[_indices(index, source), _indices(index, to_currency)]
+    out = df.copy()
+    for column in columns:
+        out[column] = out[column].to_numpy(dtype=np.float64) * factors
+    if currency_column:
+        out[currency_column] = to_currency
+    return out
+
+
+def format_amount(amount, currency=BASE_CURRENCY, decimals=None):
+    """Format a KES amount in ``currency``, e.g. 'USD 1,162.79'."""
+    value = float(convert(amount, BASE_CURRENCY, currency))
+    if decimals is None:
+        decimals = 0 if currency == BASE_CURRENCY and float(amount).is_integer() else 2
+    return f"{currency} {value:,.{decimals}f}"
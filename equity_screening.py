@@ -0,0 +1,119 @@
+# AAOIFI equity screening over a local fundamentals dataset
+import os
+
+import numpy as np
+import pandas as pd
+
+from compliance import PROHIBITED_SECTORS
+from ledger import DATA_DIR
+
+FUNDAMENTALS_PATH = os.path.join(DATA_DIR, "fundamentals.csv")
+SCREEN_CACHE_PATH = os.path.join(DATA_DIR, "equity_screen.pkl")
+
+# AAOIFI Sharia Standard No. 21 thresholds
+MAX_DEBT_RATIO = 0.30
+MAX_INTEREST_SECURITIES_RATIO = 0.30
+MAX_IMPURE_INCOME_RATIO = 0.05
+
+FUNDAMENTAL_COLUMNS = [
+    'ticker', 'name', 'sector', 'quarter', 'market_cap', 'total_debt',
+    'interest_bearing_securities', 'total_revenue', 'impure_income', 'shares_outstanding',
+]
+NUMERIC_COLUMNS = FUNDAMENTAL_COLUMNS[4:]
+
+
+def load_fundamentals(path=None):
+    """Read a fundamentals file, keeping only the latest quarter of each ticker.
+
+    Quarterly datasets repeat tickers once per quarter; quarters must sort
+    chronologically as text (e.g. ``2024Q3``).
+    """
+    path = path or FUNDAMENTALS_PATH
+    df = pd.read_csv(path, dtype={'ticker': str, 'name': str, 'sector': str, 'quarter': str})
+    missing = [c for c in FUNDAMENTAL_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Fundamentals file is missing columns: {', '.join(missing)}")
+    blank = df['ticker'].isna() | df['quarter'].isna()
+    if blank.any():
+        # +2 for the header row and one-based line numbers
+        lines = ", ".join(str(i + 2) for i in df.index[blank][:10])
+        raise ValueError(f"Fundamentals rows without a ticker or quarter on lines: {lines}")
+    df[NUMERIC_COLUMNS] = df[NUMERIC_COLUMNS].astype(np.float64)
+    df['ticker'] = df['ticker'].str.strip().str.upper()
+    df = df.sort_values(['ticker', 'quarter'], kind='stable').drop_duplicates('ticker', keep='last')
+    return df[FUNDAMENTAL_COLUMNS].reset_index(drop=True)
+
+
+def _safe_ratio(numerator, denominator):
+    # Zero or missing denominators fail the screen rather than divide by zero
+    out = np.full(numerator.shape, np.inf)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def screen(fundamentals):
+    """Apply sector exclusions and AAOIFI ratio screens to every row at once."""
+    market_cap = fundamentals['market_cap'].to_numpy()
+    revenue = fundamentals['total_revenue'].to_numpy()
+    impure_income = fundamentals['impure_income'].to_numpy()
+    shares = fundamentals['shares_outstanding'].to_numpy()
+
+    debt_ratio = _safe_ratio(fundamentals['total_debt'].to_numpy(), market_cap)
+    securities_ratio = _safe_ratio(fundamentals['interest_bearing_securities'].to_numpy(), market_cap)
+    impure_ratio = _safe_ratio(impure_income, revenue)
+
+    sector_pattern = "|".join(PROHIBITED_SECTORS)
+    sector_ok = ~fundamentals['sector'].fillna("").str.lower().str.contains(sector_pattern, regex=True).to_numpy()
+    debt_ok = debt_ratio < MAX_DEBT_RATIO
+    securities_ok = securities_ratio < MAX_INTEREST_SECURITIES_RATIO
+    impure_ok = impure_ratio < MAX_IMPURE_INCOME_RATIO
+
+    result = fundamentals[['ticker', 'name', 'sector', 'quarter']].copy()
+    result['debt_ratio'] = debt_ratio
+    result['interest_securities_ratio'] = securities_ratio
+    result['impure_income_ratio'] = impure_ratio
+    result['sector_ok'] = sector_ok
+    result['compliant'] = sector_ok & debt_ok & securities_ok & impure_ok
+    # Impure income attributable to each share, to be given away as charity
+    result['purification_per_share'] = _safe_ratio(impure_income, shares)
+    result.loc[~np.isfinite(result['purification_per_share']), 'purification_per_share'] = 0.0
+    return result
+
+
+def load_cached_screen(path=None):
+    path = path or SCREEN_CACHE_PATH
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+    return None
+
+
+def save_cached_screen(result, path=None):
+    path = path or SCREEN_CACHE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    result.to_pickle(path)
+
+
+def run_quarterly_screen(fundamentals_path=None, cache_path=None):
+    """Screen the whole universe and cache the result for the next session.
+
+    A full vectorized screen of 50k tickers takes tens of milliseconds, less
+    than working out which tickers changed since the cached run.
+    """
+    result = screen(load_fundamentals(fundamentals_path))
+    save_cached_screen(result, cache_path)
+    return result
+
+
+def purification(screen_result, holdings):
+    """Purification amount for each holding, given a {ticker: shares} mapping.
+
+    Tickers missing from the screened universe come back with ``found``
+    False and no purification amount.
+    """
+    held = pd.DataFrame({'ticker': list(holdings), 'shares': list(holdings.values())})
+    universe = screen_result[['ticker', 'name', 'compliant', 'purification_per_share']].drop_duplicates('ticker', keep='last')
+    merged = held.merge(universe, on='ticker', how='left')
+    merged['found'] = merged['purification_per_share'].notna()
+    merged['purification_per_share'] = merged['purification_per_share'].fillna(0.0)
+    merged['purification_amount'] = merged['shares'].to_numpy() * merged['purification_per_share'].to_numpy()
+    return merged
@@ -0,0 +1,52 @@
+# Arabic and Swahili localization and RTL-aware text export
+import json
+import os
+from functools import lru_cache
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+
+LANGUAGES = {
+    'en': "English",
+    'ar': "العربية",
+    'sw': "Kiswahili",
+}
+RTL_LANGUAGES = {'ar'}
+RLM = "\u200f"
+
+
+@lru_cache(maxsize=None)
+def catalog(lang):
+    """Load a language's message catalog once per process."""
+    path = os.path.join(LOCALES_DIR, f"{lang}.json")
+    if lang == 'en' or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def translator(lang):
+    """Return a gettext-style ``_(text, key=None)`` function bound to ``lang``."""
+    messages = catalog(lang)
+
+    def _(text, key=None):
+        return messages.get(key or text, text)
+
+    return _
+
+
+def direction(lang):
+    return "rtl" if lang in RTL_LANGUAGES else "ltr"
+
+
+def export_text(text, lang):
+    """Text for a plain-text download, kept in logical order.
+
+    Text editors run the bidi algorithm themselves, as browsers do, so
+    reordering the text first would reverse it a second time. For RTL
+    languages each line starts with a right-to-left mark so lines opening
+    with digits or Latin text are still laid out right to left.
+    """
+    if direction(lang) != "rtl":
+        return text
+    return "\n".join(RLM + line for line in text.split("\n"))
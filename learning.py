@@ -0,0 +1,144 @@
+# Learning Center lessons, server-side quiz grading and bitset progress
+import json
+import math
+import os
+import pickle
+from functools import lru_cache
+
+import numpy as np
+
+from ledger import DATA_DIR
+
+CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "learning.json")
+BUNDLE_PATH = os.path.join(DATA_DIR, "learning_bundle.pkl")
+
+
+def compile_bundle(source=CONTENT_PATH, target=BUNDLE_PATH):
+    """Validate the lesson source and write the indexed bundle the app loads."""
+    with open(source, encoding="utf-8") as f:
+        content = json.load(f)
+
+    lessons = []
+    for bit, lesson in enumerate(content['lessons']):
+        for question in lesson['quiz']:
+            if not 0 <= question['answer'] < len(question['options']):
+                raise ValueError(f"Invalid answer index in lesson {lesson['id']}: {question['question']}")
+        lessons.append({
+            'id': lesson['id'],
+            'title': lesson['title'],
+            'bit': bit,
+            'sections': lesson['sections'],
+            # Questions go to the page without their answers
+            'questions': [{'question': q['question'], 'options': q['options']} for q in lesson['quiz']],
+        })
+    if len(lessons) > 63:
+        raise ValueError("Progress bitsets hold at most 63 lessons")
+
+    by_id = {lesson['id']: lesson for lesson in lessons}
+    course_masks = {}
+    for course in content['courses']:
+        mask = 0
+        for lesson_id in course['lessons']:
+            mask |= 1 << by_id[lesson_id]['bit']
+        course_masks[course['name']] = mask
+
+    bundle = {
+        'lessons': lessons,
+        'by_id': by_id,
+        'by_title': {lesson['title']: lesson for lesson in lessons},
+        'answer_keys': {lesson['id']: [q['answer'] for q in lesson['quiz']] for lesson in content['lessons']},
+        'course_masks': course_masks,
+        'pass_mark': content.get('pass_mark', 0.7),
+    }
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    tmp = target + ".tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+    return bundle
+
+
+@lru_cache(maxsize=1)
+def load_bundle(source=CONTENT_PATH, target=BUNDLE_PATH):
+    """Load the compiled bundle once per process, recompiling if the source is newer."""
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+        with open(target, "rb") as f:
+            return pickle.load(f)
+    return compile_bundle(source, target)
+
+
+def required_correct(pass_mark, total):
+    """Answers needed to pass: the pass mark's share of the questions, rounded up.
+
+    The product is rounded to 9 places first so a mark such as 0.7 on ten
+    questions asks for 7, not 8, despite float error.
+    """
+    return math.ceil(round(pass_mark * total, 9))
+
+
+def grade(bundle, lesson_id, answers):
+    """Grade submitted option indexes against the answer key held on the server."""
+    key = bundle['answer_keys'][lesson_id]
+    correct = sum(1 for given, expected in zip(answers, key) if given == expected)
+    required = required_correct(bundle['pass_mark'], len(key))
+    return {
+        'correct': correct,
+        'total': len(key),
+        'required': required,
+        'passed': correct >= required,
+    }
+
+
+def get_progress(conn, tenant_id, user_id):
+    row = conn.execute(
+        "SELECT completed, passed FROM learning_progress WHERE tenant_id = ? AND user_id = ?",
+        (tenant_id, user_id),
+    ).fetchone()
+    return row or (0, 0)
+
+
+def _set_bits(conn, tenant_id, user_id, completed, passed):
+    conn.execute(
+        """
+        INSERT INTO learning_progress (tenant_id, user_id, completed, passed) VALUES (?, ?, ?, ?)
+        ON CONFLICT (tenant_id, user_id) DO UPDATE
+        SET completed = completed | excluded.completed, passed = passed | excluded.passed
+        """,
+        (tenant_id, user_id, completed, passed),
+    )
+    conn.commit()
+
+
+def mark_completed(conn, tenant_id, user_id, lesson):
+    _set_bits(conn, tenant_id, user_id, 1 << lesson['bit'], 0)
+
+
+def mark_passed(conn, tenant_id, user_id, lesson):
+    _set_bits(conn, tenant_id, user_id, 1 << lesson['bit'], 1 << lesson['bit'])
+
+
+def is_set(bits, lesson):
+    return bool(bits >> lesson['bit'] & 1)
+
+
+def eligible_courses(bundle, passed):
+    return [name for name, mask in bundle['course_masks'].items() if passed & mask == mask]
+
+
+def cohort_summary(conn, tenant_id, bundle):
+    """Lesson pass counts and certification eligibility for a whole tenant.
+
+    The passed bitsets are read into one int64 array and every course is
+    checked with a single vectorized mask comparison.
+    """
+    passed = np.fromiter(
+        (row[0] for row in conn.execute("SELECT passed FROM learning_progress WHERE tenant_id = ?", (tenant_id,))),
+        dtype=np.int64,
+    )
+    bits = np.array([lesson['bit'] for lesson in bundle['lessons']], dtype=np.int64)
+    lesson_passes = ((passed[:, None] >> bits) & 1).sum(axis=0)
+    return {
+        'learners': len(passed),
+        'lesson_passes': {lesson['title']: int(n) for lesson, n in zip(bundle['lessons'], lesson_passes)},
+        'eligible': {name: int(((passed & mask) == mask).sum()) for name, mask in bundle['course_masks'].items()},
+    }
@@ -0,0 +1,189 @@
+# Local SQLite ledger backing imported and generated records
+import os
+import sqlite3
+
+DATA_DIR = os.environ.get("ISLA_DATA_DIR", "data")
+LEDGER_PATH = os.path.join(DATA_DIR, "ledger.db")
+
+DEFAULT_TENANT = "baraka"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenants (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    tenant_id TEXT NOT NULL REFERENCES tenants(id),
+    username TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    display_name TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'customer',
+    UNIQUE (tenant_id, username)
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL DEFAULT 'baraka',
+    user_id TEXT,
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT,
+    riba INTEGER NOT NULL DEFAULT 0,
+    gharar INTEGER NOT NULL DEFAULT 0,
+    sectors TEXT NOT NULL DEFAULT '',
+    compliant INTEGER NOT NULL DEFAULT 1,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS partnership_distributions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL DEFAULT 'baraka',
+    period TEXT NOT NULL,
+    partnership_id TEXT NOT NULL,
+    contract_type TEXT NOT NULL,
+    period_profit REAL NOT NULL,
+    bank_amount REAL NOT NULL,
+    customer_amount REAL NOT NULL,
+    buyout REAL NOT NULL,
+    bank_capital_after REAL NOT NULL,
+    customer_capital_after REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS review_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant_id TEXT NOT NULL,
+    contract_id TEXT NOT NULL,
+    contract_type TEXT NOT NULL,
+    contract_value REAL NOT NULL,
+    submitted_by TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    reviewer TEXT,
+    submitted_at REAL NOT NULL,
+    due_at REAL NOT NULL,
+    assigned_at REAL,
+    decided_at REAL,
+    decided_by TEXT,
+    decision_note TEXT,
+    UNIQUE (tenant_id, contract_id)
+);
+CREATE TABLE IF NOT EXISTS learning_progress (
+    tenant_id TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    passed INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, user_id)
+);
+"""
+
+# Indexes are created after migrations so they can reference added columns
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_transactions_tenant_date ON transactions(tenant_id, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions(tenant_id, user_id, date);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_distributions_period ON partnership_distributions(tenant_id, partnership_id, period);
+CREATE INDEX IF NOT EXISTS idx_review_status_type ON review_queue(tenant_id, status, contract_type, priority DESC, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_review_status_priority ON review_queue(tenant_id, status, priority DESC, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_review_reviewer ON review_queue(tenant_id, reviewer, status);
+CREATE INDEX IF NOT EXISTS idx_review_due ON review_queue(tenant_id, status, due_at);
+"""
+
+# Columns added after a table was first released: (table, column, definition)
+MIGRATIONS = [
+    ('transactions', 'tenant_id', "TEXT NOT NULL DEFAULT 'baraka'"),
+    ('transactions', 'user_id', "TEXT"),
+    ('partnership_distributions', 'tenant_id', "TEXT NOT NULL DEFAULT 'baraka'"),
+    ('review_queue', 'decided_by', "TEXT"),
+]
+
+
+def _migrate(conn):
+    for table, column, definition in MIGRATIONS:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    # Superseded by the tenant-prefixed indexes
+    for index in ('idx_transactions_date', 'idx_distributions_partnership', 'idx_distributions_tenant_partnership'):
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+    unique_period = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_distributions_period'"
+    ).fetchone()
+    if unique_period is None:
+        # Keep only the latest booking of periods distributed more than once
+        conn.execute(
+            "DELETE FROM partnership_distributions WHERE id NOT IN "
+            "(SELECT MAX(id) FROM partnership_distributions GROUP BY tenant_id, partnership_id, period)"
+        )
+        conn.commit()
+
+
+def connect(path=None):
+    path = path or LEDGER_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path)
+    # Users must belong to a tenant that exists
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    conn.executescript(INDEXES)
+    return conn
+
+
+def insert_transactions(conn, rows, tenant_id=DEFAULT_TENANT, user_id=None, commit=True):
+    """Insert screened transaction rows in a single executemany call.
+
+    Pass ``commit=False`` to leave the rows in the caller's open transaction.
+    """
+    conn.executemany(
+        """
+        INSERT INTO transactions
+            (tenant_id, user_id, date, type, amount, status, description, riba, gharar, sectors, compliant, source)
+        VALUES
+            (:tenant_id, :user_id, :date, :type, :amount, :status, :description, :riba, :gharar, :sectors, :compliant, :source)
+        """,
+        (dict(row, tenant_id=tenant_id, user_id=user_id) for row in rows),
+    )
+    if commit:
+        conn.commit()
+    return len(rows)
+
+
+def insert_distributions(conn, rows, tenant_id=DEFAULT_TENANT):
+    """Upsert partnership profit/loss distributions in a single executemany call.
+
+    A partnership has one distribution per period; writing the same period
+    again replaces it.
+    """
+    conn.executemany(
+        """
+        INSERT INTO partnership_distributions
+            (tenant_id, period, partnership_id, contract_type, period_profit, bank_amount, customer_amount,
+             buyout, bank_capital_after, customer_capital_after)
+        VALUES
+            (:tenant_id, :period, :partnership_id, :contract_type, :period_profit, :bank_amount, :customer_amount,
+             :buyout, :bank_capital_after, :customer_capital_after)
+        ON CONFLICT (tenant_id, partnership_id, period) DO UPDATE SET
+            contract_type = excluded.contract_type,
+            period_profit = excluded.period_profit,
+            bank_amount = excluded.bank_amount,
+            customer_amount = excluded.customer_amount,
+            buyout = excluded.buyout,
+            bank_capital_after = excluded.bank_capital_after,
+            customer_capital_after = excluded.customer_capital_after
+        """,
+        (dict(row, tenant_id=tenant_id) for row in rows),
+    )
+    conn.commit()
+    return len(rows)
+
+
+def recent_transactions(conn, tenant_id, user_id, limit=50):
+    """One customer's latest transactions; other customers of the bank are never included."""
+    cursor = conn.execute(
+        "SELECT date, type, amount, status, description, compliant FROM transactions "
+        "WHERE tenant_id = ? AND user_id = ? ORDER BY date DESC, id DESC LIMIT ?",
+        (tenant_id, user_id, limit),
+    )
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
@@ -0,0 +1,122 @@
+# Profit-and-loss sharing for Musharakah and Mudarabah partnerships
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import ledger
+
+PARTNERSHIP_COLUMNS = [
+    'partnership_id', 'contract_type', 'bank_capital', 'customer_capital',
+    'bank_profit_ratio', 'period_profit',
+]
+NUMERIC_COLUMNS = ['bank_capital', 'customer_capital', 'bank_profit_ratio', 'period_profit']
+OPTIONAL_COLUMNS = {'buyout_per_period': 0.0}
+
+
+def _is_mudarabah(contract_types):
+    return contract_types.fillna("").str.lower().str.startswith("mudarabah").to_numpy()
+
+
+def load_partnerships(source):
+    """Read and validate a partnerships file.
+
+    Blank optional cells take their default, and a Mudarabah customer needs
+    no capital; any other blank or non-numeric value is rejected with the
+    file lines it appears on. ``bank_profit_ratio`` is a percentage from 0
+    to 100, as on the contract form's slider.
+    """
+    df = pd.read_csv(source, dtype={'partnership_id': str, 'contract_type': str})
+    missing = [c for c in PARTNERSHIP_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Partnership file is missing columns: {', '.join(missing)}")
+    for column, default in OPTIONAL_COLUMNS.items():
+        if column not in df.columns:
+            df[column] = default
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(default)
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    df.loc[_is_mudarabah(df['contract_type']), 'customer_capital'] = 0.0
+
+    for column in PARTNERSHIP_COLUMNS:
+        blank = df[column].isna()
+        if blank.any():
+            raise ValueError(f"Missing or invalid {column} on lines: {_lines(df.index[blank])}")
+    out_of_range = ~df['bank_profit_ratio'].between(0, 100)
+    if out_of_range.any():
+        raise ValueError(f"bank_profit_ratio must be a percentage from 0 to 100 on lines: {_lines(df.index[out_of_range])}")
+    return df
+
+
+def _lines(index):
+    # +2 for the header row and one-based line numbers
+    return ", ".join(str(i + 2) for i in index[:10])
+
+
+def distribute(partnerships):
+    """Run one period-end profit or loss distribution for every partnership.
+
+    Profits are split by the agreed profit ratio. Losses are borne in
+    proportion to capital, so in a Mudarabah the customer (mudarib, with no
+    capital) loses only their effort. Diminishing Musharakah buyouts move
+    ``buyout_per_period`` of capital from the bank to the customer after the
+    distribution.
+    """
+    is_mudarabah = _is_mudarabah(partnerships['contract_type'])
+
+    bank_capital = partnerships['bank_capital'].to_numpy(dtype=np.float64)
+    customer_capital = np.where(is_mudarabah, 0.0, partnerships['customer_capital'].to_numpy(dtype=np.float64))
+    total_capital = bank_capital + customer_capital
+    bank_capital_share = np.divide(bank_capital, total_capital, out=np.zeros_like(total_capital), where=total_capital > 0)
+
+    profit = partnerships['period_profit'].to_numpy(dtype=np.float64)
+    bank_ratio = partnerships['bank_profit_ratio'].to_numpy(dtype=np.float64) / 100
+
+    bank_share = np.where(profit >= 0, bank_ratio, bank_capital_share)
+    bank_amount = profit * bank_share
+    customer_amount = profit - bank_amount
+
+    buyout = np.minimum(partnerships['buyout_per_period'].to_numpy(dtype=np.float64), bank_capital)
+    buyout = np.where(is_mudarabah, 0.0, buyout)
+
+    return pd.DataFrame({
+        'partnership_id': partnerships['partnership_id'].to_numpy(),
+        'contract_type': partnerships['contract_type'].to_numpy(),
+        'period_profit': profit,
+        'bank_amount': bank_amount,
+        'customer_amount': customer_amount,
+        'buyout': buyout,
+        'bank_capital_after': bank_capital - buyout,
+        'customer_capital_after': customer_capital + buyout,
+    })
+
+
+def diminishing_schedule(asset_value, bank_share, periods, rent_rate):
+    """Buyout schedule for a diminishing Musharakah over equal periods.
+
+    The customer buys the bank's units in equal instalments and pays rent
+    (``rent_rate`` per period) on the share the bank still owns.
+    """
+    bank_value = asset_value * bank_share
+    buyout = np.full(periods, bank_value / periods)
+    bank_before = bank_value - buyout.cumsum() + buyout
+    rent = bank_before * rent_rate
+    return pd.DataFrame({
+        'period': np.arange(1, periods + 1),
+        'bank_share_start': bank_before / asset_value,
+        'rent': rent,
+        'buyout': buyout,
+        'total_payment': rent + buyout,
+        'bank_share_end': (bank_before - buyout) / asset_value,
+    })
+
+
+def record_distributions(conn, distributions, period=None, tenant_id=ledger.DEFAULT_TENANT):
+    """Write a batch of distributions to the ledger in one executemany.
+
+    ``period`` defaults to the current month. Re-running a period replaces
+    its earlier figures rather than booking them twice.
+    """
+    period = period or datetime.now().strftime("%Y-%m")
+    rows = distributions.assign(period=period)
+    return ledger.insert_distributions(conn, rows.to_dict('records'), tenant_id=tenant_id)
@@ -0,0 +1,183 @@
+# Monte Carlo projection of Halal investment values
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Annual expected return and volatility per asset class
+ASSET_CLASS_ASSUMPTIONS = {
+    'Sukuk': {'return': 8.5, 'volatility': 4.0},
+    'Equity': {'return': 12.2, 'volatility': 18.0},
+    'Real Estate': {'return': 7.8, 'volatility': 10.0},
+}
+DEFAULT_ASSET_CLASS = 'Equity'
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+CHUNK_PATHS = 10000
+# Log-spaced value bins per month; quantiles are interpolated within a bin
+HISTOGRAM_BINS = 2048
+# Width of the per-month value band in standard deviations of the widest asset
+BAND_SIGMAS = 6.0
+
+
+def asset_class_for(name):
+    """Guess the asset class of a holding from its name."""
+    lowered = name.lower()
+    if "sukuk" in lowered:
+        return 'Sukuk'
+    if "real estate" in lowered or "property" in lowered:
+        return 'Real Estate'
+    return DEFAULT_ASSET_CLASS
+
+
+def _monthly_params(annual_returns, annual_vols):
+    sigma = np.asarray(annual_vols, dtype=np.float64) / 100 / np.sqrt(12)
+    mu = np.log1p(np.asarray(annual_returns, dtype=np.float64) / 100) / 12 - 0.5 * sigma ** 2
+    return mu, sigma
+
+
+def _log_bands(amounts, mu, sigma, months, monthly_contribution):
+    """Per-month range of log portfolio value shared by every chunk.
+
+    A portfolio grows no slower than its worst asset and no faster than its
+    best, so a ``BAND_SIGMAS`` band around each asset's drift bounds the
+    holdings; contributions are bounded the same way over any shorter span.
+    Paths outside the band fall into the end bins and only move the extreme
+    tails.
+    """
+    t = np.arange(1, months + 1)[:, None]
+    spread = BAND_SIGMAS * sigma * np.sqrt(t)
+    low = np.exp((mu * t - spread).min(axis=1))
+    high = np.exp((mu * t + spread).max(axis=1))
+    contributed = monthly_contribution * t[:, 0]
+    total = amounts.sum()
+    lo = np.log(np.maximum(total * low + contributed * np.minimum(np.minimum.accumulate(low), 1), 1e-9))
+    hi = np.log(np.maximum(total * high + contributed * np.maximum(np.maximum.accumulate(high), 1), 1e-9))
+    width = np.maximum(hi - lo, 1e-6) / HISTOGRAM_BINS
+    return lo, width
+
+
+def _chunk_values(amounts, mu, sigma, months, n_paths, monthly_contribution, seed):
+    """Portfolio value paths, shape (paths, months), for one chunk."""
+    rng = np.random.default_rng(seed)
+    # (paths, months, assets) log returns, compounded along the month axis
+    shocks = rng.standard_normal((n_paths, months, len(amounts)), dtype=np.float32)
+    log_growth = np.cumsum(mu.astype(np.float32) + sigma.astype(np.float32) * shocks, axis=1)
+    del shocks
+    growth = np.exp(log_growth)
+    del log_growth
+    values = (amounts.astype(np.float32) * growth).sum(axis=2)
+    if monthly_contribution:
+        # Each contribution compounds at the portfolio's average growth from its month onwards
+        weights = amounts / amounts.sum() if amounts.sum() > 0 else np.full(len(amounts), 1 / len(amounts))
+        average = (weights.astype(np.float32) * growth).sum(axis=2)
+        values += monthly_contribution * average * np.cumsum(1 / average, axis=1)
+    return values
+
+
+def _simulate_chunk(args):
+    """Simulate one chunk of paths and reduce it to per-month histograms.
+
+    Only the histogram counts, the sum of final values and the number of
+    paths reaching the goal leave the worker, so memory and transfer size
+    do not grow with the number of paths.
+    """
+    amounts, mu, sigma, months, n_paths, monthly_contribution, goal, lo, width, seed = args
+    values = _chunk_values(amounts, mu, sigma, months, n_paths, monthly_contribution, seed)
+    position = (np.log(np.maximum(values, 1e-9)) - lo.astype(np.float32)) / width.astype(np.float32)
+    bins = np.clip(position, 0, HISTOGRAM_BINS - 1).astype(np.int32)
+    bins += np.arange(months, dtype=np.int32) * HISTOGRAM_BINS
+    counts = np.bincount(bins.ravel(), minlength=months * HISTOGRAM_BINS).reshape(months, HISTOGRAM_BINS)
+
+    final_values = values[:, -1].astype(np.float64)
+    reached = int((final_values >= goal).sum()) if goal is not None else 0
+    return counts.astype(np.int32), float(final_values.sum()), reached
+
+
+def _histogram_quantiles(counts, lo, width, quantiles):
+    """Read quantiles off per-month histograms, interpolating within the bin."""
+    cumulative = np.cumsum(counts, axis=1)
+    rows = np.arange(len(counts))
+    out = np.empty((len(counts), len(quantiles)))
+    for j, q in enumerate(quantiles):
+        target = q * cumulative[:, -1]
+        index = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        before = np.where(index > 0, cumulative[rows, index - 1], 0)
+        inside = counts[rows, index]
+        fraction = np.divide(target - before, inside, out=np.full(len(counts), 0.5), where=inside > 0)
+        out[:, j] = np.exp(lo + (index + fraction) * width)
+    return out
+
+
+def simulate(amounts, annual_returns, annual_vols, months=120, n_paths=100000,
+             monthly_contribution=0.0, goal=None, seed=None, workers=1, chunk_paths=CHUNK_PATHS):
+    """Simulate portfolio value paths and summarise them as quantile bands.
+
+    Paths are generated ``chunk_paths`` at a time and each chunk is reduced
+    to per-month histograms before the next one starts, so peak memory is
+    one chunk of draws plus ``months x HISTOGRAM_BINS`` counts whatever
+    ``n_paths`` is. With ``workers > 1`` chunks are spread across a process
+    pool and only the reduced counts are sent back.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    mu, sigma = _monthly_params(annual_returns, annual_vols)
+    lo, width = _log_bands(amounts, mu, sigma, months, monthly_contribution)
+
+    sizes = [chunk_paths] * (n_paths // chunk_paths)
+    if n_paths % chunk_paths:
+        sizes.append(n_paths % chunk_paths)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(amounts, mu, sigma, months, size, monthly_contribution, goal, lo, width, s)
+             for size, s in zip(sizes, seeds)]
+
+    counts = np.zeros((months, HISTOGRAM_BINS), dtype=np.int64)
+    final_total = 0.0
+    reached = 0
+
+    def merge(chunk):
+        nonlocal counts, final_total, reached
+        chunk_counts, chunk_final, chunk_reached = chunk
+        counts += chunk_counts
+        final_total += chunk_final
+        reached += chunk_reached
+
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, os.cpu_count() or 1)) as pool:
+            for chunk in pool.map(_simulate_chunk, tasks):
+                merge(chunk)
+    else:
+        for task in tasks:
+            merge(_simulate_chunk(task))
+
+    fan = pd.DataFrame(
+        _histogram_quantiles(counts, lo, width, QUANTILES),
+        index=pd.RangeIndex(1, months + 1, name='month'),
+        columns=[f"p{int(q * 100)}" for q in QUANTILES],
+    )
+    return {
+        'fan': fan,
+        'start_value': float(amounts.sum()),
+        'expected_final': final_total / n_paths,
+        'goal_probability': reached / n_paths if goal is not None else None,
+    }
+
+
+def project_portfolio(investments, months=120, n_paths=100000, goal=None, **kwargs):
+    """Project the session's investment list using per-asset-class volatility."""
+    amounts = [inv['amount'] for inv in investments]
+    returns = [inv['return'] for inv in investments]
+    vols = [ASSET_CLASS_ASSUMPTIONS[asset_class_for(inv['name'])]['volatility'] for inv in investments]
+    return simulate(amounts, returns, vols, months=months, n_paths=n_paths, goal=goal, **kwargs)
+
+
+def project_opportunity(opportunity, amount, months, n_paths=20000, goal=None, **kwargs):
+    assumptions = ASSET_CLASS_ASSUMPTIONS.get(opportunity['type'], ASSET_CLASS_ASSUMPTIONS[DEFAULT_ASSET_CLASS])
+    return simulate([amount], [opportunity['return']], [assumptions['volatility']],
+                    months=months, n_paths=n_paths, goal=goal, **kwargs)
+
+
+def duration_months(duration):
+    """Convert labels like '3 years' or '6 months' to a number of months."""
+    count, unit = duration.split()[:2]
+    return int(count) * (12 if unit.startswith("year") else 1)
@@ -0,0 +1,182 @@
+# Sharia Board review queue: prioritised contracts, balanced assignment and SLAs
+import heapq
+import time
+
+import audit_log
+
+PENDING = 'pending'
+ASSIGNED = 'assigned'
+APPROVED = 'approved'
+REJECTED = 'rejected'
+OPEN_STATUSES = (PENDING, ASSIGNED)
+
+REVIEWER_ROLES = ('admin', 'sharia_board')
+
+# Partnership and manufacturing contracts need closer review
+HIGH_COMPLEXITY_TYPES = ('Musharakah', 'Mudarabah', 'Istisna')
+LARGE_CONTRACT_VALUE = 1_000_000
+
+# Review deadline in hours for each priority level
+SLA_HOURS = {1: 72, 2: 48, 3: 24}
+
+
+def priority_for(contract_type, contract_value):
+    priority = 1
+    if contract_type.startswith(HIGH_COMPLEXITY_TYPES):
+        priority += 1
+    if contract_value >= LARGE_CONTRACT_VALUE:
+        priority += 1
+    return priority
+
+
+def submit(conn, tenant_id, contract_id, contract_type, contract_value, submitted_by, now=None):
+    """Queue a contract for review; resubmitting the same contract is a no-op."""
+    now = now or time.time()
+    priority = priority_for(contract_type, contract_value)
+    cursor = conn.execute(
+        """
+        INSERT OR IGNORE INTO review_queue
+            (tenant_id, contract_id, contract_type, contract_value, submitted_by, priority, submitted_at, due_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (tenant_id, contract_id, contract_type, contract_value, submitted_by, priority,
+         now, now + SLA_HOURS[priority] * 3600),
+    )
+    conn.commit()
+    return cursor.rowcount == 1
+
+
+def reviewers(conn, tenant_id):
+    placeholders = ",".join("?" * len(REVIEWER_ROLES))
+    rows = conn.execute(
+        f"SELECT id, display_name FROM users WHERE tenant_id = ? AND role IN ({placeholders}) ORDER BY display_name",
+        (tenant_id, *REVIEWER_ROLES),
+    )
+    return dict(rows.fetchall())
+
+
+def assign_pending(conn, tenant_id, reviewer_ids, limit=1000, now=None):
+    """Assign the most urgent pending items to the least-loaded reviewers.
+
+    Current load comes from one grouped query; assignments are written with
+    a single executemany.
+    """
+    if not reviewer_ids:
+        return 0
+    now = now or time.time()
+    load = dict.fromkeys(reviewer_ids, 0)
+    for reviewer, count in conn.execute(
+        "SELECT reviewer, COUNT(*) FROM review_queue WHERE tenant_id = ? AND status = ? GROUP BY reviewer",
+        (tenant_id, ASSIGNED),
+    ):
+        if reviewer in load:
+            load[reviewer] = count
+
+    pending = conn.execute(
+        "SELECT id FROM review_queue WHERE tenant_id = ? AND status = ? "
+        "ORDER BY priority DESC, submitted_at LIMIT ?",
+        (tenant_id, PENDING, limit),
+    ).fetchall()
+
+    heap = [(count, reviewer) for reviewer, count in load.items()]
+    heapq.heapify(heap)
+    assignments = []
+    for (item_id,) in pending:
+        count, reviewer = heapq.heappop(heap)
+        assignments.append((reviewer, now, item_id))
+        heapq.heappush(heap, (count + 1, reviewer))
+
+    conn.executemany(
+        f"UPDATE review_queue SET status = '{ASSIGNED}', reviewer = ?, assigned_at = ? WHERE id = ? AND status = '{PENDING}'",
+        assignments,
+    )
+    conn.commit()
+    return len(assignments)
+
+
+DECISION_EVENTS = {APPROVED: audit_log.SHARIA_APPROVE, REJECTED: audit_log.SHARIA_REJECT}
+
+
+def decide(conn, tenant_id, item_ids, decision, decided_by, note="", now=None, audit=None):
+    """Approve or reject many open items at once.
+
+    The assigned reviewer is kept and the deciding user is recorded in
+    ``decided_by``. With an ``audit`` log, one event per decided contract is
+    appended under the deciding user.
+    """
+    if decision not in (APPROVED, REJECTED):
+        raise ValueError(f"Unknown decision: {decision}")
+    now = now or time.time()
+    item_ids = list(item_ids)
+    decided = []
+    # Stay well under SQLite's bound-parameter limit
+    for start in range(0, len(item_ids), 500):
+        chunk = item_ids[start:start + 500]
+        decided += conn.execute(
+            f"SELECT id, contract_id, contract_value FROM review_queue "
+            f"WHERE tenant_id = ? AND status IN (?, ?) AND id IN ({','.join('?' * len(chunk))})",
+            (tenant_id, *OPEN_STATUSES, *chunk),
+        ).fetchall()
+    # Re-check the status per row: another reviewer may have decided an item
+    # since it was read, and only the first decision stands
+    updated = []
+    for item_id, contract_id, value in decided:
+        cursor = conn.execute(
+            f"""
+            UPDATE review_queue
+            SET status = ?, decided_by = ?, decided_at = ?, decision_note = ?
+            WHERE id = ? AND tenant_id = ? AND status IN ('{PENDING}', '{ASSIGNED}')
+            """,
+            (decision, decided_by, now, note, item_id, tenant_id),
+        )
+        if cursor.rowcount == 1:
+            updated.append((contract_id, value))
+    conn.commit()
+    if audit is not None:
+        audit.append_many([(DECISION_EVENTS[decision], tenant_id, decided_by, value, contract_id)
+                           for contract_id, value in updated])
+    return len(updated)
+
+
+def status_counts(conn, tenant_id):
+    """Item counts per (status, contract_type), answered from the status index."""
+    return conn.execute(
+        "SELECT status, contract_type, COUNT(*) FROM review_queue WHERE tenant_id = ? GROUP BY status, contract_type",
+        (tenant_id,),
+    ).fetchall()
+
+
+def overdue_count(conn, tenant_id, now=None):
+    now = now or time.time()
+    return conn.execute(
+        "SELECT COUNT(*) FROM review_queue WHERE tenant_id = ? AND status IN (?, ?) AND due_at < ?",
+        (tenant_id, *OPEN_STATUSES, now),
+    ).fetchone()[0]
+
+
+def list_items(conn, tenant_id, status=None, contract_type=None, reviewer=None, limit=200, offset=0):
+    """One page of queue items, most urgent first."""
+    clauses = ["tenant_id = ?"]
+    params = [tenant_id]
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if contract_type:
+        clauses.append("contract_type = ?")
+        params.append(contract_type)
+    if reviewer:
+        clauses.append("reviewer = ?")
+        params.append(reviewer)
+    cursor = conn.execute(
+        f"""
+        SELECT id, contract_id, contract_type, contract_value, submitted_by, priority, status,
+               reviewer, submitted_at, due_at, decided_at, decided_by, decision_note
+        FROM review_queue
+        WHERE {' AND '.join(clauses)}
+        ORDER BY priority DESC, submitted_at
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset),
+    )
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
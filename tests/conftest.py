@@ -0,0 +1,18 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Keep the ledger, audit log and caches out of the working tree
+os.environ.setdefault("ISLA_DATA_DIR", tempfile.mkdtemp(prefix="isla-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ledger  # noqa: E402
+
+
+@pytest.fixture
+def conn():
+    conn = ledger.connect(":memory:")
+    yield conn
+    conn.close()
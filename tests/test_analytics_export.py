@@ -0,0 +1,79 @@
+import os
+
+import pyarrow.dataset as ds
+import pytest
+
+import analytics_export
+import ledger
+from audit_log import DONATE, INVEST, EventLog
+
+
+def _row(date, amount=100.0):
+    return {'date': date, 'type': "Deposit", 'amount': amount, 'status': "Completed",
+            'description': "Salary", 'riba': 0, 'gharar': 0, 'sectors': "", 'compliant': 1, 'source': "test"}
+
+
+@pytest.fixture
+def log(tmp_path):
+    return EventLog(str(tmp_path / "audit"))
+
+
+def _partitions(directory, dataset):
+    return sorted(os.listdir(os.path.join(directory, "parquet", dataset, "tenant=baraka")))
+
+
+def test_unparseable_dates_go_to_the_unknown_partition(conn, log, tmp_path):
+    ledger.insert_transactions(conn, [_row("2023-10-01"), _row("2023-10-02 09:30:00"), _row("1/10/23"), _row("")])
+    out = str(tmp_path / "analytics")
+
+    stats = analytics_export.export(conn, log, ["baraka"], out, "parquet")
+
+    assert stats['rows']['transactions'] == 4
+    assert _partitions(out, "transactions") == ["date=2023-10-01", "date=2023-10-02", "date=unknown"]
+    unknown = os.path.join(out, "parquet", "transactions", "tenant=baraka", "date=unknown")
+    assert all(name.endswith(".parquet") for name in os.listdir(unknown))
+
+
+def test_exports_are_incremental_and_events_use_utc_days(conn, log, tmp_path):
+    out = str(tmp_path / "analytics")
+    ledger.insert_transactions(conn, [_row("2023-10-01")])
+    log.append(INVEST, "baraka", "amina", 1000, "Opening portfolio")
+    seq = log.append(INVEST, "baraka", "amina", 300, "Halal Equity Fund")
+    log.append(DONATE, "equity", "omar", 10, "Orphan Care")
+    analytics_export.export(conn, log, ["baraka"], out, "parquet")
+
+    ledger.insert_transactions(conn, [_row("2023-10-01", 50.0)])
+    log.append(DONATE, "baraka", "amina", 25, "Orphan Care")
+    stats = analytics_export.export(conn, log, ["baraka"], out, "parquet")
+    assert (stats['rows']['transactions'], stats['rows']['investments'], stats['rows']['donations']) == (1, 0, 1)
+
+    transactions = ds.dataset(os.path.join(out, "parquet", "transactions"), partitioning="hive").to_table()
+    assert sorted(transactions.column('amount').to_pylist()) == [50.0, 100.0]
+
+    investments = ds.dataset(os.path.join(out, "parquet", "investments"), partitioning="hive").to_table().to_pandas()
+    assert investments['seq'].tolist() == [seq]
+    assert str(investments['ts'].dt.tz) == "UTC"
+    assert investments['ts'].iloc[0].strftime("%Y-%m-%d") == str(investments['date'].iloc[0])[:10]
+
+
+def test_rerun_after_a_failed_run_does_not_duplicate_rows(conn, log, tmp_path, monkeypatch):
+    out = str(tmp_path / "analytics")
+    ledger.insert_transactions(conn, [_row("2023-10-01")])
+    log.append(INVEST, "baraka", "amina", 300, "Halal Equity Fund")
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(analytics_export, "save_watermarks", crash)
+        with pytest.raises(OSError):
+            analytics_export.export(conn, log, ["baraka"], out, "parquet")
+
+    ledger.insert_transactions(conn, [_row("2023-10-01", 50.0)])
+    log.append(INVEST, "baraka", "amina", 200, "Halal Equity Fund")
+    analytics_export.export(conn, log, ["baraka"], out, "parquet")
+
+    transactions = ds.dataset(os.path.join(out, "parquet", "transactions"), partitioning="hive").to_table()
+    assert sorted(transactions.column('amount').to_pylist()) == [50.0, 100.0]
+    investments = ds.dataset(os.path.join(out, "parquet", "investments"), partitioning="hive").to_table()
+    assert sorted(investments.column('amount').to_pylist()) == [200.0, 300.0]
@@ -0,0 +1,83 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+
+import audit_log
+from audit_log import DEPOSIT, DONATE, INVEST, PAY_ZAKAT, SIGN_CONTRACT, EventLog
+
+
+@pytest.fixture
+def log(tmp_path):
+    return EventLog(str(tmp_path), segment_events=10, snapshot_every=7)
+
+
+def _fill(log):
+    log.append(DEPOSIT, "baraka", "amina", 1000)
+    log.append(INVEST, "baraka", "amina", 300, "Halal Equity Fund")
+    log.append(INVEST, "baraka", "amina", 200, "Halal Equity Fund")
+    log.append(INVEST, "baraka", "amina", 100, "Green Energy Sukuk")
+    log.append(PAY_ZAKAT, "baraka", "amina", 25)
+    log.append(DEPOSIT, "baraka", "omar", 50)
+    for i in range(15):
+        log.append(SIGN_CONTRACT, "baraka", "omar", 1, f"contract-{i}")
+    log.append(DONATE, "baraka", "amina", 10, "Orphan Care")
+
+
+def test_state_and_holdings_survive_reopening(log, tmp_path):
+    _fill(log)
+    expected_state = log.user_state("amina")
+    assert expected_state['savings'] == pytest.approx(1000 - 600 - 25 - 10)
+    assert expected_state['investments'] == pytest.approx(600)
+
+    reopened = EventLog(str(tmp_path), segment_events=10, snapshot_every=7)
+    assert reopened.user_state("amina") == expected_state
+    assert reopened.user_state("omar")['contracts_signed'] == 15
+    holdings = {h['name']: h['amount'] for h in reopened.user_holdings("amina")}
+    assert holdings == {"Halal Equity Fund": 500.0, "Green Energy Sukuk": 100.0}
+    assert reopened.user_holdings("omar") == []
+    assert reopened.user_state("nobody")['savings'] == 0.0
+
+
+def test_state_rows_only_for_users(log):
+    _fill(log)
+    _, state = log.replay()
+    # Contract references do not get state rows
+    assert sorted(log.symbol_text(int(i)) for i in state['users']) == ["amina", "omar"]
+
+
+def test_old_snapshots_are_pruned(log, tmp_path):
+    _fill(log)
+    snapshots = glob.glob(os.path.join(str(tmp_path), "snapshot-*.npz"))
+    assert len(snapshots) == audit_log.SNAPSHOTS_KEPT
+
+
+def test_snapshot_replay_matches_genesis_replay(log, tmp_path):
+    _fill(log)
+    _, from_snapshot = log.replay()
+    for path in glob.glob(os.path.join(str(tmp_path), "snapshot-*.npz")):
+        os.remove(path)
+    _, from_genesis = log.replay()
+    for key in from_genesis:
+        np.testing.assert_array_equal(from_snapshot[key], from_genesis[key])
+
+
+def test_user_events_pick_up_new_events(log):
+    _fill(log)
+    recent = log.user_events("amina", limit=3)
+    assert [e['event'] for e in recent] == ["Donation", "Pay Zakat", "Invest"]
+
+    log.append(DEPOSIT, "baraka", "amina", 5, "Top up")
+    log.append(DEPOSIT, "baraka", "omar", 5, "Top up")
+    recent = log.user_events("amina", limit=3)
+    assert [(e['event'], e['amount']) for e in recent] == [("Deposit", 5.0), ("Donation", 10.0), ("Pay Zakat", 25.0)]
+    assert [e['seq'] for e in recent] == sorted((e['seq'] for e in recent), reverse=True)
+    # A larger limit rescans instead of returning the smaller cached list
+    assert len(log.user_events("amina", limit=50)) == 7
+
+
+def test_events_after_reads_from_the_offset(log):
+    _fill(log)
+    seqs = np.concatenate([block['seq'] for block in log.events_after(12)])
+    assert seqs.tolist() == list(range(13, log.last_seq() + 1))
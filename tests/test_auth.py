@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+import auth
+
+
+@pytest.fixture
+def tenants(conn):
+    auth.ensure_tenants(conn)
+    auth.create_tenant(conn, "equity", "Equity Islamic Bank")
+    return conn
+
+
+def test_create_tenant_and_list(tenants):
+    assert auth.list_tenants(tenants) == [("baraka", "Baraka Islamic Bank"), ("equity", "Equity Islamic Bank")]
+
+
+@pytest.mark.parametrize("tenant_id, name, message", [
+    ("equity", "Again", "already exists"),
+    ("Bad Id", "Bank", "lowercase"),
+    ("newbank", "  ", "name is required"),
+])
+def test_create_tenant_rejects_bad_input(tenants, tenant_id, name, message):
+    with pytest.raises(auth.AuthError, match=message):
+        auth.create_tenant(tenants, tenant_id, name)
+
+
+def test_users_need_an_existing_tenant(tenants):
+    with pytest.raises(auth.AuthError, match="Unknown bank"):
+        auth.create_user(tenants, "otherbank", "amina", "s3cret-pass", "Amina")
+    # The schema enforces it too
+    with pytest.raises(sqlite3.IntegrityError):
+        tenants.execute(
+            "INSERT INTO users (id, tenant_id, username, password_hash, display_name) VALUES ('u', 'otherbank', 'a', 'h', 'A')"
+        )
+
+
+def test_login_is_scoped_to_the_tenant(tenants):
+    auth.create_user(tenants, "equity", "amina", "s3cret-pass", "Amina")
+    claims = auth.verify_token(auth.login(tenants, "equity", "amina", "s3cret-pass"))
+    assert (claims['tenant'], claims['name'], claims['tenant_name']) == ("equity", "Amina", "Equity Islamic Bank")
+    with pytest.raises(auth.AuthError):
+        auth.login(tenants, "baraka", "amina", "s3cret-pass")
+    with pytest.raises(auth.AuthError):
+        auth.login(tenants, "equity", "amina", "wrong-pass")
+
+
+def test_tampered_token_is_rejected(tenants):
+    auth.create_user(tenants, "equity", "amina", "s3cret-pass", "Amina")
+    token = auth.login(tenants, "equity", "amina", "s3cret-pass")
+    with pytest.raises(auth.AuthError):
+        auth.verify_token(token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB"))
+
+
+def test_cli_creates_tenants(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(auth.ledger, "LEDGER_PATH", str(tmp_path / "ledger.db"))
+    auth.main(["create-tenant", "kcb", "KCB Sahl"])
+    assert "kcb\tKCB Sahl" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        auth.main(["create-tenant", "kcb", "KCB Sahl"])
+
+
+def test_registration_never_grants_admin(tenants):
+    auth.create_user(tenants, "equity", "first", "s3cret-pass", "First")
+    claims = auth.verify_token(auth.login(tenants, "equity", "first", "s3cret-pass"))
+    assert claims['role'] == "customer"
+    with pytest.raises(auth.AuthError, match="Unknown role"):
+        auth.create_user(tenants, "equity", "second", "s3cret-pass", "Second", role="root")
+
+
+def test_cli_provisions_admins(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(auth.ledger, "LEDGER_PATH", str(tmp_path / "ledger.db"))
+    monkeypatch.setenv("ISLA_USER_PASSWORD", "s3cret-pass")
+    auth.main(["create-user", "baraka", "yusuf", "--name", "Yusuf"])
+    auth.main(["create-user", "baraka", "fatuma", "--role", "customer"])
+    auth.main(["set-role", "baraka", "fatuma", "sharia_board"])
+    assert "baraka\tfatuma\tsharia_board" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        auth.main(["set-role", "baraka", "nobody", "admin"])
+
+    conn = auth.ledger.connect()
+    try:
+        assert dict(conn.execute("SELECT username, role FROM users")) == {"yusuf": "admin", "fatuma": "sharia_board"}
+    finally:
+        conn.close()
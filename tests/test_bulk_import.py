@@ -0,0 +1,134 @@
+import io
+
+import pytest
+
+import bulk_import
+import ledger
+from bulk_import import import_rows, import_statement, parse_csv, parse_ofx
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX>
+<BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20231001120000
+<TRNAMT>-500.00
+<NAME>Casino Royale
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20231002
+<TRNAMT>85000.00
+<NAME>Salary
+<MEMO>October
+</STMTTRN>
+</BANKTRANLIST>
+</OFX>
+"""
+
+OFX_XML_ONE_LINE = (
+    '<?xml version="1.0"?><OFX><BANKTRANLIST>'
+    "<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>20231001</DTPOSTED><TRNAMT>-500.00</TRNAMT>"
+    "<NAME>Casino Royale</NAME></STMTTRN>"
+    "<STMTTRN><TRNTYPE>CREDIT</TRNTYPE><DTPOSTED>20231002</DTPOSTED><TRNAMT>85000.00</TRNAMT>"
+    "<NAME>Salary</NAME><MEMO>October</MEMO></STMTTRN>"
+    "</BANKTRANLIST></OFX>"
+)
+
+
+def _ledger_rows(conn):
+    return conn.execute("SELECT date, amount, description, compliant FROM transactions ORDER BY id").fetchall()
+
+
+@pytest.mark.parametrize("text", [OFX_SGML, OFX_XML_ONE_LINE], ids=["sgml", "xml-one-line"])
+def test_parse_ofx_yields_every_transaction(text):
+    rows = list(parse_ofx(io.StringIO(text)))
+    assert [(r['date'], r['amount'], r['type'], r['description']) for r in rows] == [
+        ("2023-10-01", -500.0, "Debit", "Casino Royale"),
+        ("2023-10-02", 85000.0, "Credit", "Salary October"),
+    ]
+
+
+@pytest.mark.parametrize("text", [OFX_SGML, OFX_XML_ONE_LINE], ids=["sgml", "xml-one-line"])
+def test_ofx_tokens_do_not_depend_on_chunk_boundaries(text):
+    # Three-character chunks split tags and values at every possible point
+    small = list(bulk_import._ofx_tokens(io.StringIO(text), chunk_size=3))
+    assert small == list(bulk_import._ofx_tokens(io.StringIO(text)))
+
+
+def test_ofx_import_screens_the_debit(conn):
+    stats = import_statement("statement.ofx", OFX_XML_ONE_LINE.encode(), conn=conn)
+    assert stats['rows'] == 2
+    assert stats['flagged'] == 1
+    assert _ledger_rows(conn)[0][3] == 0
+
+
+def test_bad_amount_reports_line_number():
+    text = "date,amount,description\n2023-10-01,100,Groceries\n2023-10-02,abc,Rent\n"
+    with pytest.raises(ValueError, match="line 3"):
+        list(parse_csv(io.StringIO(text)))
+
+
+def test_unparseable_date_is_rejected():
+    text = "date,amount,description\n1/10/23,100,Groceries\n"
+    with pytest.raises(ValueError, match="line 2: unrecognised date"):
+        list(parse_csv(io.StringIO(text)))
+
+
+def test_failed_import_writes_nothing(conn):
+    lines = ["date,amount,description"]
+    lines += [f"2023-10-01,{i},Row {i}" for i in range(30)]
+    lines.append("2023-10-01,oops,Broken")
+    data = "\n".join(lines).encode()
+    with pytest.raises(ValueError, match="line 32"):
+        import_rows(parse_csv(io.StringIO(data.decode())), conn, workers=1, batch_size=10)
+    assert _ledger_rows(conn) == []
+
+    # A corrected file then imports exactly once
+    fixed = data.replace(b"oops", b"1")
+    assert import_statement("statement.csv", fixed, conn=conn)['rows'] == 31
+    assert conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0] == 31
+
+
+def test_parallel_import_matches_serial(conn):
+    text = "date,amount,description\n" + "\n".join(f"2023-10-01,{i},Bar alcohol {i % 2}" for i in range(200))
+    stats = import_rows(parse_csv(io.StringIO(text)), conn, user_id="amina", workers=2, batch_size=25)
+    assert stats['rows'] == 200
+    assert stats['flagged'] == 200
+    assert ledger.recent_transactions(conn, ledger.DEFAULT_TENANT, "amina", limit=1)[0]['compliant'] == 0
+
+
+def test_recent_transactions_belong_to_the_importing_user(conn):
+    import_statement("statement.csv", b"date,amount,description\n2023-10-01,10,Groceries\n", conn=conn, user_id="amina")
+    import_statement("statement.csv", b"date,amount,description\n2023-10-02,99,Rent\n", conn=conn, user_id="omar")
+    assert [row['amount'] for row in ledger.recent_transactions(conn, ledger.DEFAULT_TENANT, "amina")] == [10.0]
+    assert ledger.recent_transactions(conn, "equity", "amina") == []
+
+
+def test_date_format_is_chosen_once_per_file():
+    us = "date,amount,description\n03/04/2023,1,A\n03/14/2023,2,B\n04/05/2023,3,C\n"
+    assert [r['date'] for r in parse_csv(io.StringIO(us))] == ["2023-03-04", "2023-03-14", "2023-04-05"]
+    uk = "date,amount,description\n03/04/2023,1,A\n14/03/2023,2,B\n"
+    assert [r['date'] for r in parse_csv(io.StringIO(uk))] == ["2023-04-03", "2023-03-14"]
+
+
+def test_ambiguous_or_mixed_date_files_are_rejected():
+    ambiguous = "date,amount,description\n03/04/2023,1,A\n05/05/2023,2,B\n"
+    with pytest.raises(ValueError, match="line 2: ambiguous date"):
+        list(parse_csv(io.StringIO(ambiguous)))
+    mixed = "date,amount,description\n03/14/2023,1,A\n14/03/2023,2,B\n"
+    with pytest.raises(ValueError, match="line 3: unrecognised date"):
+        list(parse_csv(io.StringIO(mixed)))
+
+
+@pytest.mark.parametrize("text", ['[{"date": "2023-10-01", "amount": 1}]', '"2023-10-01"', "42"])
+def test_json_records_must_be_objects(text):
+    with pytest.raises(ValueError, match="line 1: expected an object"):
+        list(bulk_import.parse_jsonl(io.StringIO(text)))
+
+
+def test_plain_json_files_are_not_accepted():
+    with pytest.raises(ValueError, match="Unsupported statement format"):
+        bulk_import.detect_parser("statement.json")
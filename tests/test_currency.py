@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import currency
+
+
+@pytest.fixture
+def rates(monkeypatch, tmp_path):
+    """Point the module at a temporary rate file and clear its cache."""
+    path = tmp_path / "fx_rates.json"
+    monkeypatch.setattr(currency, "RATES_PATH", str(path))
+    monkeypatch.setattr(currency, "RATES_URL", None)
+    monkeypatch.setattr(currency, "_cache", dict(currency._cache, matrix=None, refreshing=False))
+
+    def write(payload):
+        path.write_text(json.dumps(payload))
+        currency._cache['matrix'] = None
+
+    return write
+
+
+def test_usd_based_feed_is_inverted_to_kes(rates):
+    rates({"base": "USD", "rates": {"KES": 129.0, "EUR": 0.92}})
+    assert float(currency.convert(129000, "KES", "USD")) == pytest.approx(1000.0)
+    assert float(currency.convert(1, "EUR", "KES")) == pytest.approx(129 / 0.92)
+    assert currency.format_amount(129000, "USD") == "USD 1,000.00"
+
+
+def test_kes_based_file(rates):
+    rates({"base": "KES", "rates": {"USD": 1 / 129.0}})
+    assert currency.currencies() == ["KES", "USD"]
+    assert float(currency.convert(1, "USD", "KES")) == pytest.approx(129.0)
+
+
+@pytest.mark.parametrize("payload", [
+    {"rates": {"KES": 1.0, "USD": 129.0}},
+    {"base": "USD", "rates": {"EUR": 0.92}},
+    {"base": "USD", "rates": {"KES": 129.0, "EUR": 0}},
+])
+def test_invalid_rate_files_fall_back_to_defaults(rates, payload):
+    rates(payload)
+    assert currency.currencies() == sorted(currency.DEFAULT_RATES)
+    assert currency.BASE_CURRENCY in currency.currencies()
+
+
+def test_convert_frame_and_arrays(rates):
+    rates({"base": "KES", "rates": {"USD": 0.01, "EUR": 0.005}})
+    df = pd.DataFrame({'amount': [100.0, 200.0], 'ccy': ["USD", "EUR"]})
+    out = currency.convert_frame(df, ['amount'], "KES", currency_column='ccy')
+    assert out['amount'].tolist() == pytest.approx([10000.0, 40000.0])
+    np.testing.assert_allclose(currency.convert([100, 100], ["USD", "EUR"], "KES"), [10000.0, 20000.0])
+    with pytest.raises(ValueError, match="Unknown currency"):
+        currency.convert(1, "XYZ")
+
+
+def test_slow_refresh_does_not_block_other_callers(rates, monkeypatch):
+    rates({"base": "KES", "rates": {"USD": 0.01}})
+    currency.rate_table()
+    currency._cache['loaded_at'] = 0.0
+
+    release = threading.Event()
+    original = currency._read_rates
+
+    def slow_read():
+        release.wait(5)
+        return original()
+
+    monkeypatch.setattr(currency, "_read_rates", slow_read)
+    refresher = threading.Thread(target=currency.rate_table)
+    refresher.start()
+    while not currency._cache['refreshing']:
+        time.sleep(0.001)
+
+    started = time.monotonic()
+    assert currency.currencies() == ["KES", "USD"]
+    assert time.monotonic() - started < 1
+    release.set()
+    refresher.join()
+    assert not currency._cache['refreshing']
@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+import equity_screening
+
+HEADER = ("ticker,name,sector,quarter,market_cap,total_debt,interest_bearing_securities,"
+          "total_revenue,impure_income,shares_outstanding\n")
+
+
+def _write(tmp_path, rows):
+    path = tmp_path / "fundamentals.csv"
+    path.write_text(HEADER + "\n".join(rows) + "\n")
+    return path
+
+
+def test_latest_quarter_per_ticker_is_kept(tmp_path):
+    path = _write(tmp_path, [
+        "safe,Safe Co,Technology,2024Q2,1000,100,50,500,10,100",
+        "SAFE,Safe Co,Technology,2024Q1,1000,900,50,500,10,100",
+        "BET,Bet Co,Casino Gaming,2024Q2,1000,0,0,500,0,100",
+    ])
+    fundamentals = equity_screening.load_fundamentals(path)
+    assert sorted(fundamentals['ticker']) == ["BET", "SAFE"]
+    assert fundamentals.set_index('ticker').loc["SAFE", 'quarter'] == "2024Q2"
+
+
+def test_screen_applies_sector_and_ratio_thresholds(tmp_path):
+    path = _write(tmp_path, [
+        "SAFE,Safe Co,Technology,2024Q2,1000,100,50,500,10,100",
+        "DEBT,Debt Co,Technology,2024Q2,1000,300,0,500,0,100",
+        "BET,Bet Co,Casino Gaming,2024Q2,1000,0,0,500,0,100",
+        "ZERO,Zero Co,Technology,2024Q2,0,0,0,500,0,100",
+    ])
+    result = equity_screening.screen(equity_screening.load_fundamentals(path)).set_index('ticker')
+    assert result['compliant'].to_dict() == {"BET": False, "DEBT": False, "SAFE": True, "ZERO": False}
+    assert result.loc["SAFE", 'purification_per_share'] == pytest.approx(0.1)
+
+
+def test_repeated_runs_with_repeated_tickers(tmp_path):
+    path = _write(tmp_path, [
+        "SAFE,Safe Co,Technology,2024Q1,1000,100,50,500,10,100",
+        "SAFE,Safe Co,Technology,2024Q2,1000,100,50,500,20,100",
+    ])
+    cache = tmp_path / "screen.pkl"
+    for _ in range(2):
+        result = equity_screening.run_quarterly_screen(path, cache)
+    assert len(result) == 1
+    assert len(equity_screening.load_cached_screen(cache)) == 1
+
+
+def test_blank_ticker_is_rejected(tmp_path):
+    path = _write(tmp_path, [",Nameless,Technology,2024Q2,1000,100,50,500,10,100"])
+    with pytest.raises(ValueError, match="lines: 2"):
+        equity_screening.load_fundamentals(path)
+
+
+def test_purification_reports_unknown_tickers():
+    result = pd.DataFrame({'ticker': ["SAFE"], 'name': ["Safe Co"], 'compliant': [True],
+                           'purification_per_share': [0.1]})
+    held = equity_screening.purification(result, {"SAFE": 1000, "NOPE": 50}).set_index('ticker')
+    assert held.loc["SAFE", 'purification_amount'] == pytest.approx(100.0)
+    assert held['found'].to_dict() == {"SAFE": True, "NOPE": False}
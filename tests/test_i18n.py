@@ -0,0 +1,53 @@
+import ast
+import os
+
+import pytest
+
+import i18n
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Isla.py")
+
+
+def _app_strings():
+    """Every string literal passed to ``_()`` in the app, with its ``key=`` if given."""
+    with open(APP_PATH, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "_":
+            if node.args and isinstance(node.args[0], ast.Constant) and isinstance(node.args[0].value, str):
+                key = next((kw.value.value for kw in node.keywords if kw.arg == "key"), None)
+                yield key or node.args[0].value
+
+
+@pytest.mark.parametrize("lang", [lang for lang in i18n.LANGUAGES if lang != 'en'])
+def test_catalogs_cover_every_app_string(lang):
+    strings = set(_app_strings())
+    assert strings
+    assert sorted(strings - set(i18n.catalog(lang))) == []
+
+
+def test_translator_falls_back_to_the_source_text():
+    assert i18n.translator('en')("Navigation") == "Navigation"
+    assert i18n.translator('sw')("Navigation") == i18n.catalog('sw')["Navigation"]
+    assert i18n.translator('sw')("Not in any catalog") == "Not in any catalog"
+    # Unknown languages have an empty catalog rather than failing
+    assert i18n.translator('xx')("Navigation") == "Navigation"
+
+
+def test_key_lookup_takes_precedence_over_text():
+    _ = i18n.translator('ar')
+    assert _("Anything at all", key="Navigation") == i18n.catalog('ar')["Navigation"]
+    assert _("Fallback text", key="missing.key") == "Fallback text"
+
+
+def test_direction():
+    assert i18n.direction('ar') == "rtl"
+    assert i18n.direction('sw') == i18n.direction('en') == "ltr"
+
+
+def test_export_keeps_logical_order():
+    text = "عقد مرابحة\n2024-01-01 البائع"
+    exported = i18n.export_text(text, 'ar')
+    assert exported.split("\n") == [i18n.RLM + "عقد مرابحة", i18n.RLM + "2024-01-01 البائع"]
+    assert exported.replace(i18n.RLM, "") == text
+    assert i18n.export_text(text, 'sw') == text
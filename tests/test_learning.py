@@ -0,0 +1,63 @@
+import pytest
+
+import learning
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    return learning.compile_bundle(target=str(tmp_path / "bundle.pkl"))
+
+
+@pytest.mark.parametrize("answers, correct, passed", [
+    ([1, 1, 0], 3, True),
+    ([1, 1, None], 2, True),
+    ([1, 0, None], 1, False),
+    ([], 0, False),
+])
+def test_grade_two_of_three_passes(bundle, answers, correct, passed):
+    result = learning.grade(bundle, "intro", answers)
+    assert (result['correct'], result['total'], result['required'], result['passed']) == (correct, 3, 2, passed)
+
+
+@pytest.mark.parametrize("pass_mark, total, required", [
+    (0.66, 3, 2), (0.7, 10, 7), (0.7, 3, 3), (0.5, 5, 3), (1.0, 4, 4),
+])
+def test_required_correct_rounds_up(pass_mark, total, required):
+    assert learning.required_correct(pass_mark, total) == required
+
+
+def test_questions_ship_without_answers(bundle):
+    assert all('answer' not in q for lesson in bundle['lessons'] for q in lesson['questions'])
+
+
+def test_progress_bits_only_accumulate(conn, bundle):
+    intro, riba = bundle['by_id']['intro'], bundle['by_id']['riba']
+    learning.mark_passed(conn, "baraka", "amina", intro)
+    learning.mark_completed(conn, "baraka", "amina", riba)
+    learning.mark_completed(conn, "baraka", "amina", intro)
+
+    completed, passed = learning.get_progress(conn, "baraka", "amina")
+    assert learning.is_set(completed, intro) and learning.is_set(completed, riba)
+    assert learning.is_set(passed, intro) and not learning.is_set(passed, riba)
+    assert learning.get_progress(conn, "equity", "amina") == (0, 0)
+
+
+def test_eligibility_and_cohort_summary(conn, bundle):
+    for lesson_id in ["intro", "riba"]:
+        learning.mark_passed(conn, "baraka", "amina", bundle['by_id'][lesson_id])
+    for lesson_id in ["riba", "sukuk", "advanced-contracts"]:
+        learning.mark_passed(conn, "baraka", "omar", bundle['by_id'][lesson_id])
+    learning.mark_passed(conn, "equity", "zainab", bundle['by_id']['intro'])
+
+    assert learning.eligible_courses(bundle, learning.get_progress(conn, "baraka", "amina")[1]) == [
+        "Islamic Banking Fundamentals"]
+
+    summary = learning.cohort_summary(conn, "baraka", bundle)
+    assert summary['learners'] == 2
+    assert summary['lesson_passes']["Understanding Riba (Interest)"] == 2
+    assert summary['lesson_passes']["Introduction to Islamic Finance"] == 1
+    assert summary['eligible'] == {
+        "Certified Islamic Finance Executive (CIFE)": 0,
+        "Sharia Advisory Certification": 1,
+        "Islamic Banking Fundamentals": 1,
+    }
@@ -0,0 +1,118 @@
+import io
+import sqlite3
+
+import pytest
+
+import ledger
+import partnership
+
+HEADER = "partnership_id,contract_type,bank_capital,customer_capital,bank_profit_ratio,period_profit,buyout_per_period\n"
+
+
+def _load(*rows):
+    return partnership.load_partnerships(io.StringIO(HEADER + "\n".join(rows) + "\n"))
+
+
+def _by_id(distributions):
+    return distributions.set_index('partnership_id')
+
+
+def test_profit_is_split_by_agreed_ratio():
+    result = _by_id(partnership.distribute(_load("P1,Musharakah,600000,400000,70,100000,")))
+    assert result.loc["P1", 'bank_amount'] == pytest.approx(70000)
+    assert result.loc["P1", 'customer_amount'] == pytest.approx(30000)
+
+
+def test_loss_is_borne_by_capital_share():
+    # The 70% profit ratio does not apply to losses
+    result = _by_id(partnership.distribute(_load("P1,Musharakah,600000,400000,70,-50000,")))
+    assert result.loc["P1", 'bank_amount'] == pytest.approx(-30000)
+    assert result.loc["P1", 'customer_amount'] == pytest.approx(-20000)
+
+
+def test_mudarabah_customer_loses_only_effort():
+    result = _by_id(partnership.distribute(_load(
+        "M1,Mudarabah,500000,,60,40000,",
+        "M2,Mudarabah,500000,,60,-40000,",
+    )))
+    assert result.loc["M1", 'bank_amount'] == pytest.approx(24000)
+    assert result.loc["M1", 'customer_amount'] == pytest.approx(16000)
+    assert result.loc["M2", 'bank_amount'] == pytest.approx(-40000)
+    assert result.loc["M2", 'customer_amount'] == pytest.approx(0)
+
+
+def test_diminishing_buyout_moves_capital_and_is_capped():
+    result = _by_id(partnership.distribute(_load(
+        "D1,Diminishing Musharakah,800000,200000,50,0,100000",
+        "D2,Diminishing Musharakah,50000,950000,50,0,100000",
+        "M1,Mudarabah,500000,,60,0,100000",
+    )))
+    assert result.loc["D1", ['buyout', 'bank_capital_after', 'customer_capital_after']].tolist() == [100000, 700000, 300000]
+    assert result.loc["D2", ['buyout', 'bank_capital_after', 'customer_capital_after']].tolist() == [50000, 0, 1000000]
+    assert result.loc["M1", 'buyout'] == 0
+
+
+def test_blank_optional_cells_take_defaults():
+    partnerships = _load("P1,Musharakah,600000,400000,70,100000,")
+    assert partnerships['buyout_per_period'].tolist() == [0.0]
+
+
+@pytest.mark.parametrize("row", [
+    "P1,Musharakah,600000,400000,70,,",
+    "P1,Musharakah,600000,,70,1000,",
+    "P1,Musharakah,abc,400000,70,1000,",
+])
+def test_blank_required_cells_are_rejected(row):
+    with pytest.raises(ValueError, match="lines: 3"):
+        _load("P0,Musharakah,1,1,50,0,", row)
+
+
+def test_profit_ratio_is_always_a_percentage():
+    result = _by_id(partnership.distribute(_load("P1,Musharakah,600000,400000,1,1000,")))
+    assert result.loc["P1", 'bank_amount'] == pytest.approx(10)
+    assert result.loc["P1", 'customer_amount'] == pytest.approx(990)
+
+
+def test_profit_ratio_outside_0_to_100_is_rejected():
+    with pytest.raises(ValueError, match="percentage from 0 to 100 on lines: 3, 4"):
+        _load("P0,Musharakah,1,1,100,0,", "P1,Musharakah,1,1,150,0,", "P2,Musharakah,1,1,-5,0,")
+
+
+def test_rerunning_a_period_replaces_it(conn):
+    first = partnership.distribute(_load("P1,Musharakah,600000,400000,70,100000,"))
+    corrected = partnership.distribute(_load("P1,Musharakah,600000,400000,70,120000,"))
+    partnership.record_distributions(conn, first, period="2024-03")
+    partnership.record_distributions(conn, corrected, period="2024-03")
+    partnership.record_distributions(conn, first, period="2024-04")
+    rows = conn.execute(
+        "SELECT period, period_profit FROM partnership_distributions ORDER BY period"
+    ).fetchall()
+    assert rows == [("2024-03", 120000.0), ("2024-04", 100000.0)]
+
+
+def test_existing_duplicate_periods_are_collapsed(tmp_path):
+    path = str(tmp_path / "ledger.db")
+    raw = sqlite3.connect(path)
+    raw.executescript(ledger.SCHEMA)
+    row = ('baraka', '2024-03', 'P1', 'Musharakah', 1.0, 1.0, 0.0, 0.0, 1.0, 1.0)
+    raw.executemany(
+        "INSERT INTO partnership_distributions (tenant_id, period, partnership_id, contract_type, period_profit, "
+        "bank_amount, customer_amount, buyout, bank_capital_after, customer_capital_after) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [row, row],
+    )
+    raw.commit()
+    raw.close()
+
+    conn = ledger.connect(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM partnership_distributions").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_schedule_buys_out_the_bank_share():
+    schedule = partnership.diminishing_schedule(1_000_000, 0.8, 4, 0.01)
+    assert schedule['buyout'].sum() == pytest.approx(800000)
+    assert schedule['bank_share_end'].iloc[-1] == pytest.approx(0)
+    assert schedule['rent'].iloc[0] == pytest.approx(8000)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import projection
+
+AMOUNTS = np.array([30000.0, 25000.0, 20000.0])
+RETURNS = [8.5, 12.2, 7.8]
+VOLS = [4.0, 18.0, 10.0]
+
+
+@pytest.mark.parametrize("contribution", [0.0, 500.0])
+def test_histogram_quantiles_match_exact_quantiles(contribution):
+    months = 240
+    mu, sigma = projection._monthly_params(RETURNS, VOLS)
+    lo, width = projection._log_bands(AMOUNTS, mu, sigma, months, contribution)
+    seed = np.random.SeedSequence(3)
+
+    values = projection._chunk_values(AMOUNTS, mu, sigma, months, 5000, contribution, seed)
+    counts, final_total, reached = projection._simulate_chunk(
+        (AMOUNTS, mu, sigma, months, 5000, contribution, 200000.0, lo, width, seed))
+
+    exact = np.quantile(values, projection.QUANTILES, axis=0).T
+    estimate = projection._histogram_quantiles(counts, lo, width, projection.QUANTILES)
+    np.testing.assert_allclose(estimate, exact, rtol=0.005)
+    # No path falls outside the band into the end bins
+    assert counts[:, 0].sum() == counts[:, -1].sum() == 0
+    assert final_total == pytest.approx(values[:, -1].astype(np.float64).sum(), rel=1e-9)
+    assert reached == int((values[:, -1] >= 200000.0).sum())
+
+
+def test_chunking_and_workers_do_not_change_the_result():
+    kwargs = dict(months=36, n_paths=3000, goal=80000, seed=11)
+    serial = projection.simulate(AMOUNTS, RETURNS, VOLS, chunk_paths=1000, **kwargs)
+    pooled = projection.simulate(AMOUNTS, RETURNS, VOLS, chunk_paths=1000, workers=2, **kwargs)
+    np.testing.assert_array_equal(serial['fan'].to_numpy(), pooled['fan'].to_numpy())
+    assert serial['goal_probability'] == pooled['goal_probability']
+    assert serial['expected_final'] == pytest.approx(pooled['expected_final'])
+
+
+def test_fan_is_ordered_and_grows_with_drift():
+    result = projection.simulate([10000.0], [10.0], [5.0], months=60, n_paths=4000, seed=1)
+    fan = result['fan']
+    assert list(fan.columns) == ["p5", "p25", "p50", "p75", "p95"]
+    assert (np.diff(fan.to_numpy(), axis=1) >= 0).all()
+    assert fan['p50'].iloc[-1] > fan['p50'].iloc[0] > 10000.0
+    assert result['goal_probability'] is None
+
+
+def test_duration_months():
+    assert projection.duration_months("3 years") == 36
+    assert projection.duration_months("6 months") == 6
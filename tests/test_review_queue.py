@@ -0,0 +1,95 @@
+import pytest
+
+import auth
+import review_queue
+from audit_log import EventLog
+
+
+@pytest.fixture
+def queue(conn):
+    auth.ensure_tenants(conn)
+    for username, role in [("amina", "customer"), ("fatuma", "sharia_board"), ("yusuf", "admin")]:
+        auth.create_user(conn, "baraka", username, "s3cret-pass", username.title(), role)
+    users = dict(conn.execute("SELECT username, id FROM users"))
+    for i in range(3):
+        review_queue.submit(conn, "baraka", f"contract-{i}", "Murabaha", 1000 * (i + 1), users["amina"], now=100)
+    return conn, users
+
+
+def test_decide_records_who_decided_and_keeps_the_assignee(queue):
+    conn, users = queue
+    review_queue.assign_pending(conn, "baraka", [users["fatuma"]], now=200)
+    items = {item['contract_id']: item['id'] for item in review_queue.list_items(conn, "baraka")}
+
+    decided = review_queue.decide(conn, "baraka", [items["contract-0"], items["contract-1"]],
+                                  review_queue.APPROVED, users["yusuf"], "ok", now=300)
+    assert decided == 2
+    # Already decided items are left alone
+    assert review_queue.decide(conn, "baraka", [items["contract-0"]], review_queue.REJECTED, users["fatuma"]) == 0
+
+    rows = {item['contract_id']: item for item in review_queue.list_items(conn, "baraka")}
+    assert rows["contract-0"]['status'] == review_queue.APPROVED
+    assert (rows["contract-0"]['reviewer'], rows["contract-0"]['decided_by']) == (users["fatuma"], users["yusuf"])
+    assert rows["contract-2"]['decided_by'] is None
+
+
+def test_decisions_are_audited(queue, tmp_path):
+    conn, users = queue
+    log = EventLog(str(tmp_path))
+    ids = [item['id'] for item in review_queue.list_items(conn, "baraka")]
+
+    review_queue.decide(conn, "baraka", ids[:1], review_queue.REJECTED, users["fatuma"], audit=log)
+    review_queue.decide(conn, "baraka", ids, review_queue.APPROVED, users["fatuma"], audit=log)
+
+    events = log.user_events(users["fatuma"])
+    assert [e['event'] for e in events].count("Sharia Board Approval") == 2
+    assert [e['event'] for e in events].count("Sharia Board Rejection") == 1
+    assert {e['reference'] for e in events} == {"contract-0", "contract-1", "contract-2"}
+
+
+def test_decide_rejects_unknown_decisions(queue):
+    conn, _ = queue
+    with pytest.raises(ValueError):
+        review_queue.decide(conn, "baraka", [1], "maybe", "someone")
+
+
+class _RacingConnection:
+    """Lets a rival reviewer decide items right after ``decide`` has read them."""
+
+    def __init__(self, conn, rival):
+        self._conn = conn
+        self._rival = rival
+
+    def execute(self, sql, params=()):
+        cursor = self._conn.execute(sql, params)
+        if sql.lstrip().startswith("SELECT") and self._rival is not None:
+            rows = cursor.fetchall()
+            rival, self._rival = self._rival, None
+            rival()
+            return _Rows(rows)
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _Rows(list):
+    def fetchall(self):
+        return list(self)
+
+
+def test_concurrent_decisions_keep_the_first(queue, tmp_path):
+    conn, users = queue
+    log = EventLog(str(tmp_path))
+    ids = [item['id'] for item in review_queue.list_items(conn, "baraka")]
+
+    def rival():
+        review_queue.decide(conn, "baraka", ids[:1], review_queue.REJECTED, users["yusuf"], audit=log)
+
+    racing = _RacingConnection(conn, rival)
+    assert review_queue.decide(racing, "baraka", ids, review_queue.APPROVED, users["fatuma"], audit=log) == 2
+
+    rows = {item['id']: item for item in review_queue.list_items(conn, "baraka")}
+    assert (rows[ids[0]]['status'], rows[ids[0]]['decided_by']) == (review_queue.REJECTED, users["yusuf"])
+    assert len(log.user_events(users["fatuma"])) == 2
+    assert [e['event'] for e in log.user_events(users["yusuf"])] == ["Sharia Board Rejection"]